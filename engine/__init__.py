@@ -1,4 +1,4 @@
 # engine/__init__.py
 from .gui import gui
-from .logic import bicoder, filter, signature, filemanager, stats, progress, Achievement, settings, Flow
+from .logic import bicoder, filter, signature, filemanager, watcher, transport, stats, progress, Achievement, settings, Flow
 from .prototype import ProtoType
\ No newline at end of file
@@ -68,6 +68,8 @@ class DisplayFrame(ttk.Frame):
 
         if "binary" in content:
             insert(self.binaryfile_display, content=content["binary"], replace=True)
+        if "binary_tail" in content:
+            insert(self.binaryfile_display, content=content["binary_tail"], replace=False)
         if "display" in content:
             insert(self.monitor_display, content=content["display"], replace=True)
         if "history" in content:
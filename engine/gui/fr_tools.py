@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 
 
 class ToolFrame(ttk.Frame):
@@ -42,7 +42,7 @@ class ToolFrame(ttk.Frame):
         Parameters:
             data: The data to update the input fields with.
         """
-        if any(x in data for x in ("eol", "code_length")):
+        if any(x in data for x in ("eol", "code_length", "charset", "compression")):
             self.pckg_frame.update_on(data)
         if "code_text" in data:
             self.dict_frame.update_on(data)
@@ -96,7 +96,7 @@ def get_clean_text(tktext):
 
 class PckgFrame(ttk.Frame):
     """
-    A frame that contains the packaging settings (entry fields for EOL and code length).
+    A frame that contains the packaging settings (entry fields for EOL and code length, choice of a standard character set, compression).
     """
     def __init__(self, master, flow, msg, warn):
         """
@@ -122,9 +122,19 @@ class PckgFrame(ttk.Frame):
         self.code_length_entry = ttk.Entry(self)
         self.code_length_entry.bind('<FocusOut>', self.notify_code_length)
         self.code_length_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
+        self.charset_label = ttk.Label(self, text="Zeichensatz:")
+        self.charset_label.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+        self.charset_box = ttk.Combobox(self, values=("", "ascii", "latin-1", "utf-8"), state="readonly")
+        self.charset_box.bind('<<ComboboxSelected>>', self.notify_charset)
+        self.charset_box.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
+        self.compression_var = tk.BooleanVar(value=False)
+        self.compression_check = ttk.Checkbutton(self, text="Nachrichten komprimieren (LZ77)", variable=self.compression_var, command=self.notify_compression)
+        self.compression_check.grid(row=3, column=0, columnspan=2, padx=10, pady=5, sticky="w")
         
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=1)
+        self.grid_rowconfigure(3, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=0)
 
@@ -143,6 +153,10 @@ class PckgFrame(ttk.Frame):
             cl = data["code_length"]
             if cl:
                 self.code_length_entry.insert(0, cl)
+        if "charset" in data:
+            self.charset_box.set(data["charset"])
+        if "compression" in data:
+            self.compression_var.set(bool(data["compression"]))
 
     def notify_eol(self, event):
         """
@@ -175,11 +189,35 @@ class PckgFrame(ttk.Frame):
         except Warning as w:
             self.warn_gui(w.args)
 
+    def notify_charset(self, event):
+        """
+        Notify the flow about the selected standard character set (empty for the own dictionary).
+
+        Parameters:
+            event: The event that triggered the notification.
+        """
+        try:
+            self.flow.gui_change(data={"charset":self.charset_box.get()})
+            self.msg_gui(text="Zeichensatz aktualisiert", warn=False)
+        except Warning as w:
+            self.warn_gui(w.args)
+
+    def notify_compression(self):
+        """
+        Notify the flow about switching the compression of the messages on or off.
+        """
+        try:
+            self.flow.gui_change(data={"compression":self.compression_var.get()})
+            self.msg_gui(text="Komprimierung aktualisiert", warn=False)
+        except Warning as w:
+            self.compression_var.set(False)  # Compression could not be switched on
+            self.warn_gui(w.args)
+
 
 
 class DictFrame(ttk.Frame):
     """
-    A frame that contains the dictionary settings (entry field for code dictionary).
+    A frame that contains the dictionary settings (entry field for code dictionary, generator of an optimal dictionary).
     """
     def __init__(self, master, flow, msg, warn):
         """
@@ -198,12 +236,26 @@ class DictFrame(ttk.Frame):
         self.code_label = ttk.Label(self, text="Wörterbuch (z.B. 'a=011, b=001'):")
         self.code_label.grid(row=0, column=0, sticky="nw")
         self.code_field = tk.Text(self, height=6)
-        for event in ("<FocusOut>","<Return>", "<space>", ","):
-            self.code_field.bind(event, self.notify_dict)
+        self.delay = 400 # Milliseconds without editing before the dictionary is applied
+        self.pending = None
+        self.applied_text = ""
+        for event in ("<KeyRelease>", "<<Paste>>", "<<Cut>>"):
+            self.code_field.bind(event, self.schedule_dict) # Every edit restarts the delay
+        self.code_field.bind("<FocusOut>", self.notify_dict)
         self.code_field.grid(row=1, column=0, sticky="news")
+        self.optimal_frame = ttk.Frame(self)
+        self.optimal_frame.grid(row=2, column=0, sticky="ew")
+        self.max_length_label = ttk.Label(self.optimal_frame, text="max. Code-Länge:")
+        self.max_length_label.grid(row=0, column=0, sticky="w")
+        self.max_length_box = ttk.Spinbox(self.optimal_frame, from_=0, to=32, width=4)
+        self.max_length_box.set(0)
+        self.max_length_box.grid(row=0, column=1, padx=5, sticky="w")
+        self.optimal_button = ttk.Button(self.optimal_frame, text="Optimales Wörterbuch aus dem Netz", command=self.notify_optimal)
+        self.optimal_button.grid(row=0, column=2, sticky="w")
    
         self.grid_rowconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(2, weight=0)
         self.grid_columnconfigure(0, weight=1)
 
     def update_on(self, data):
@@ -214,22 +266,62 @@ class DictFrame(ttk.Frame):
             data: The data to update the input fields with.
         """
         if "code_text" in data:
+            self.applied_text = data["code_text"]
+            if get_clean_text(self.code_field) == data["code_text"]:
+                return
+            cursor = self.code_field.index(tk.INSERT)
             self.code_field.delete(1.0, tk.END)
             self.code_field.insert(tk.END, data["code_text"])
+            self.code_field.mark_set(tk.INSERT, cursor) # Keep the cursor where the user is typing
+
+    def schedule_dict(self, event):
+        """
+        Schedule the notification about the dictionary, so it is applied once the editing pauses.
+
+        Parameters:
+            event: The event that triggered the notification.
+        """
+        if self.pending:
+            self.after_cancel(self.pending)
+        self.pending = self.after(self.delay, self.notify_dict)
 
-    def notify_dict(self, event):
+    def notify_dict(self, event=None):
         """
-        Notify the flow about the updated dictionary.
+        Notify the flow about the updated dictionary, unless the text has not changed since it was last applied.
 
         Parameters:
             event: The event that triggered the notification.
         """
+        if self.pending:
+            self.after_cancel(self.pending)
+            self.pending = None
+        code_text = get_clean_text(self.code_field)
+        if code_text == self.applied_text:
+            return
         try:
-            self.flow.gui_change(data={"code_text":get_clean_text(self.code_field)})
+            self.flow.gui_change(data={"code_text":code_text})
             self.msg_gui(text="Wörterbuch aktualisiert", warn=False)
         except Warning as w:
             self.warn_gui(w.args)
 
+    def notify_optimal(self):
+        """
+        Let the flow build the optimal dictionary for the messages of the network, and apply it if the user agrees.
+        """
+        try:
+            try:
+                max_length = int(self.max_length_box.get() or 0)
+            except ValueError:
+                raise Warning("Code-Länge","Bitte eine gültige Zahl eingeben.")
+            code_text, report = self.flow.suggest_dict(max_length)
+            if not messagebox.askyesno("Optimales Wörterbuch", f"{code_text}\n\n{report}\n\nWörterbuch übernehmen? "
+                                       "Bisherige Nachrichten sind danach nur mit dem alten Wörterbuch lesbar.", parent=self):
+                return
+            self.flow.gui_change(data={"code_text":code_text})
+            self.msg_gui(text="Optimales Wörterbuch übernommen: "+report, warn=False)
+        except Warning as w:
+            self.warn_gui(w.args)
+
 
 
 class AddressFrame(ttk.Frame):
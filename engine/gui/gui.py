@@ -43,16 +43,17 @@ class ProtoGUI:
         """
         Start the GUI main loop.
         """
-        self.periodic_refresh()
+        self.flow.network_reload(checkforchanges = True) # Show the current network content
+        self.flow.watch_network(self.__root) # Reload whenever the network is modified
+        self.__root.protocol("WM_DELETE_WINDOW", self.close) # Leave the network before the window is gone
         self.__root.mainloop() # necessary to keep the application 'open' and running
 
-    def periodic_refresh(self):
+    def close(self):
         """
-        Periodically check for changes in the network file.
+        Leave the network and close the main window.
         """
-        self.flow.network_reload(checkforchanges = True) # Check if the file has been modified since the last check
-
-        self.__root.after(1000, self.periodic_refresh)  # Schedule the method to be called again after 1000 milliseconds (1 second)
+        self.flow.close_network()
+        self.__root.destroy()
 
     def initialize_locked_achievements(self, locked_ach):
         """
@@ -257,7 +258,7 @@ class ProtoGUI:
             self.overlay_frame.update_on(data)
         if any(x in data for x in ("username","level")):
             self.user_frame.update_on(data)
-        if any(x in data for x in ("eol","code_length","code_text","filter","signature")):
+        if any(x in data for x in ("eol","code_length","charset","compression","code_text","filter","signature")):
             self.tools_frame.update_on(data)
         if any(x in data for x in ("level","challenge","chlg_bar")):
             self.progress_frame.update_on(data)
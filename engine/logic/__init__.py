@@ -1,7 +1,7 @@
 # engine/logic/__init__.py
 from .protocol import bicoder, filter, signature
 from .progress import stats, progress, Achievement
-from .managers import filemanager, settings
+from .managers import filemanager, settings, watcher, transport
 from .flow import ProtoFlow as Flow
 
 __all__ = [
@@ -9,6 +9,8 @@ __all__ = [
     "stats",
     "Achievement",
     "filemanager",
+    "watcher",
+    "transport",
     "settings",
     "bicoder",
     "filter",
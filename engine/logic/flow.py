@@ -1,4 +1,6 @@
-from . import bicoder, filemanager, filter, signature, stats, progress, settings, Achievement as ProtoAchievement
+from . import bicoder, filemanager, transport, filter, signature, stats, progress, settings, Achievement as ProtoAchievement
+from .managers.transport import watch_transport, close_transport
+from .protocol.dict_builder import OptimalCode
 from .. import gui
 
 class ProtoFlow:
@@ -16,6 +18,11 @@ class ProtoFlow:
         self.decoding = False  # Initialize the decoding mode to off
         self.overlay_visible = False  # Initialize the overlay visibility
 
+        # Initialize the network state (filled by network_reload)
+        self._net_lines = [None]  # Display line of each line of the network (None if filtered out)
+        self._net_tail = ""  # Bits of the last (unfinished) line, the only part of the network that is kept
+        self._net_stream = None  # Streaming decoder of the last line, continued when the network grows
+
         # Initialize the everythings
         self.create_achievements()
 
@@ -62,47 +69,70 @@ class ProtoFlow:
         """
         Updates the displayed network content with the latest setting changes.
 
+        With checkforchanges, only the newly appended part of the network is loaded, split and decoded;
+        the already processed lines are kept. Otherwise the whole network is rescanned.
+
         Parameters:
-            checkforchanges (bool): Whether to check for changes in the network file before reloading.
+            checkforchanges (bool): Whether to check for changes in the network before reloading.
         """
-        _filemanager = filemanager()
+        try:
+            filemanager().check_commit()  # Report messages that a group commit could not write
+        except Warning as w:
+            gui().show_warning(w.args)
+        _transport = transport()
         if checkforchanges:
-            if not _filemanager.changes_in_network():
+            change = _transport.compare()
+            if change == _transport.UNCHANGED:
                 return
+        else:
+            change = _transport.REWRITTEN
         _gui = gui()
         try:
-            content = _filemanager.load_network_file()  # Load the file content
+            if change == _transport.APPENDED:
+                tail, rescan = _transport.load_tail(change)  # Load only the appended content
+            else:
+                tail, rescan = None, True
+                view = _transport.map()  # Map the whole network content without copying
         except Exception as e:
             # Show an error message if loading fails
             _gui.display({"display":f"Fehler beim Laden: {e}"})
             return
-        
-        # Update the binary display
-        stats().update({"net_content":content})
-        _gui.display({"binary":content})
 
         _bicoder = bicoder()
-        textlines = _bicoder.split_eol(content)
-
-        # Decode the text lines if decoding is enabled
-        if self.decoding:
-            # If decoding is enabled, decode the lines and filter them
-            decoded_lines = []
-            for line in textlines:
-                if not self.encoding and not filter().check_text(line):
-                    continue
-                # Decode each line of text
-                text = _bicoder.decode_text(line)
-                if self.encoding and not filter().check_text(text):
-                    continue
-                decoded_lines.append(text)
-            textlines = decoded_lines
+        if tail is None:
+            # Split and filter the lines on the view, only the displayed lines are copied
+            with view:
+                _bicoder.check_eol()
+                spans = _transport.message_index(_bicoder.eol, _bicoder.code_length, view).spans()
+                self._net_lines = self.render_spans(view, spans)
+                self._net_tail = view.text(spans[-1])  # The last line is the unfinished message after the last eol
+                self._net_stream = None
+                _gui.display({"binary":view.text()})
         else:
-            # If decoding is not enabled, simply filter the lines
-            textlines = filter().filter_lines(textlines)
-        
+            if rescan:
+                self._net_lines = [None]
+                self._net_tail = ""
+                self._net_stream = None
+                _gui.display({"binary":tail})
+            else:
+                _gui.display({"binary_tail":tail})
+
+            # Split again from the start of the unfinished last line on
+            content = self._net_tail + tail
+            new_parts = [content[start:end] for start, end in _bicoder.eol_spans(content)]
+            self._net_tail = new_parts[-1]
+
+            # Decode and filter the new lines (including the unfinished last line);
+            # the line that was unfinished before and the new last line are decoded by the streaming decoder
+            del self._net_lines[-1]
+            for i, line in enumerate(new_parts):
+                if self.decoding and (i == 0 or i == len(new_parts) - 1):
+                    self._net_lines.append(self.render_line(line, text=self.stream_line(line, continued=i == 0)))
+                else:
+                    self._net_lines.append(self.render_line(line))
+
         # Join the filtered lines into a single text
-        displaytext = "\n>".join(textlines)
+        displaytext = "\n>".join(line for line in self._net_lines if line is not None)
 
         # Update the file display with the decoded text
         _gui.display({"display":displaytext})
@@ -118,6 +148,111 @@ class ProtoFlow:
                 self.decoded_display.tag_add("bold", start_index, end_index)
                 start_index = end_index """
 
+    def render_spans(self, view, spans):
+        """
+        Decodes (if decoding is enabled) and filters all lines of a network view.
+        The lines are decoded together with bicoder().decode_many, on a process pool for a long history.
+
+        Parameters:
+            view (NetworkView): The view containing the lines.
+            spans (list(tuple(int, int))): The (offset, length) spans of the lines.
+
+        Returns:
+            list: The line to display for each span, or None if it is filtered out.
+        """
+        if not self.decoding:
+            return [self.render_span(view, span) for span in spans]
+        _filter = filter()
+        # Without encoding, lines that do not pass the binary filter are never copied or decoded
+        passed = [self.encoding or _filter.check_span(view, span) for span in spans]
+        texts = iter(bicoder().decode_many([view.text(span) for span, ok in zip(spans, passed) if ok]))
+        lines = []
+        for ok in passed:
+            text = next(texts) if ok else None
+            if text is not None and self.encoding and not _filter.check_text(text):
+                text = None  # The filter applies to the decoded text
+            lines.append(text)
+        return lines
+
+    def render_span(self, view, span):
+        """
+        Decodes (if decoding is enabled) and filters a single line of a network view.
+        Lines that do not pass the binary filter are never copied out of the view.
+
+        Parameters:
+            view (NetworkView): The view containing the line.
+            span (tuple(int, int)): The (offset, length) span of the line.
+
+        Returns:
+            str|None: The line to display or None if it is filtered out.
+        """
+        if self.decoding and self.encoding:
+            return self.render_line(view.text(span))  # The filter applies to the decoded text
+        if not filter().check_span(view, span):
+            return None
+        line = view.text(span)
+        return bicoder().decode_line(line) if self.decoding else line
+
+    def render_line(self, line, text=None):
+        """
+        Decodes (if decoding is enabled) and filters a single line of the network.
+
+        Parameters:
+            line (str): The binary line to render.
+            text (str): The line already decoded, if available.
+
+        Returns:
+            str|None: The line to display or None if it is filtered out.
+        """
+        _filter = filter()
+        if self.decoding:
+            if not self.encoding and not _filter.check_text(line):
+                return None
+            # Decode the line of text
+            if text is None:
+                text = bicoder().decode_line(line)
+            if self.encoding and not _filter.check_text(text):
+                return None
+            return text
+        # If decoding is not enabled, simply filter the line
+        if not _filter.check_text(line):
+            return None
+        return line
+
+    def stream_line(self, line, continued):
+        """
+        Decodes a line with the streaming decoder of the last line, so only the bits appended since the
+        last reload are decoded.
+
+        Parameters:
+            line (str): The binary line to decode.
+            continued (bool): Whether the line starts where the streamed line starts.
+
+        Returns:
+            str: The decoded text (the same as bicoder().decode_message(line)).
+        """
+        _bicoder = bicoder()
+        stream = self._net_stream
+        if not continued or stream is None or stream.version != _bicoder.version or stream.length > len(line):
+            stream = self._net_stream = _bicoder.stream_decoder()
+        stream.feed(line[stream.length:])
+        return stream.text()
+
+    def watch_network(self, root):
+        """
+        Starts watching the network for changes by other users.
+
+        Parameters:
+            root: The Tk widget whose event loop the change events are posted into.
+        """
+        watch_transport(root, lambda: self.network_reload(checkforchanges=True))
+
+    def close_network(self):
+        """
+        Stops watching the network and detaches from it (e.g. from a shared memory ring) before the program ends.
+        """
+        close_transport()
+
     def network_send(self, binary_text): #formerly append_file
         """
         Sends the binary text to the network.
@@ -127,14 +262,16 @@ class ProtoFlow:
         """
         stats().send_content(binary_text)  # inform the stats manager about the new message
 
-        # Append the binary text to the file
-        filemanager().append_network(binary_text, bicoder().code_length)
+        # Append the binary text to the network
+        _transport = transport()
+        _transport.send(binary_text, bicoder().code_length)
+        _transport.notify_activity()
 
         # Update history
         gui().display({"history":binary_text})
 
         # Update file content
-        self.network_reload()
+        self.network_reload(checkforchanges=True)
 
         # Check for achievements
         self.check_progress()
@@ -146,7 +283,12 @@ class ProtoFlow:
         # Open a file dialog to select a new file
         filepath = gui().choose_network()
         if filepath:  # if a file was selected
-            filemanager().update(network=filepath)
+            try:
+                filemanager().update(network=filepath)
+            except Warning as w:
+                gui().show_warning(w.args)
+                return
+            transport().follow(filemanager().network)
             # Set default file name to selected file name
             self.network_reload()  # Load the selected file content
 
@@ -175,10 +317,11 @@ class ProtoFlow:
         # Add signatures and eol
         _bicoder = bicoder()
         text = signature().sign(text)
-        # Encode the text line by line
-        if self.encoding:
-            text = _bicoder.encode_text(text)
+        # Encode the text line by line (and compress the lines, if enabled)
+        text = _bicoder.encode_message(text, encode=self.encoding)
         text = _bicoder.prepend_eol(_bicoder.append_eol(text))
+        if _bicoder.compression:
+            _gui.show_message(f"Nachricht komprimiert auf {_bicoder.compression_ratio:.0%}", warn=False)
 
         # Clear input field
         _gui.clear_input()
@@ -341,17 +484,55 @@ class ProtoFlow:
             data (dict): The data containing the changes to be applied.
         """
         data["encoding"] = self.encoding
+        version = bicoder().version
         autosaved = settings().parse_data(data=data)
+        if set(data) == {"code_text", "encoding"} and bicoder().version == version:
+            return # The dictionary has not changed, so neither the fields nor the network view need an update
         self.update_gui(on_keys=list(data))
 
         if autosaved:
             gui().show_message(text="automatisch gespeichert", warn=False)
         
-        if any(x in data for x in ["code_text","network","eol","filter","code_length"]):
+        if any(x in data for x in ["code_text","network","transport","eol","filter","code_length","charset","compression"]):
             self.network_reload()
             
         settings().check_integrity(on_keys=list(data), encoding=self.encoding)
 
+    def suggest_dict(self, max_length=0):
+        """
+        Builds the optimal dictionary for the messages of the network that can be decoded with the current
+        dictionary. The dictionary is only proposed, applying it is up to the user (gui_change with code_text).
+
+        Parameters:
+            max_length (int): The longest allowed code, or 0 for no limit.
+
+        Returns:
+            tuple(str, str): The dictionary text and the comparison of the new with the previous dictionary.
+
+        Raises:
+            Warning: If there is nothing to build from.
+        """
+        _bicoder = bicoder()
+        if _bicoder.charset or _bicoder.code_length:
+            raise Warning("Wörterbuch", "Das optimale Wörterbuch hat Codes verschiedener Länge: Zeichensatz und feste Code-Länge bitte ausschalten!")
+        _transport = transport()
+        with _transport.map() as view:
+            _bicoder.check_eol()
+            spans = _transport.message_index(_bicoder.eol, _bicoder.code_length, view).spans()
+            lines = [view.text(span) for span in spans]
+        texts = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                texts.append(_bicoder.decode_message(line, warn=True))
+            except Warning:
+                pass  # Lines that cannot be decoded are not part of the sample
+        if not texts:
+            raise Warning("Wörterbuch", "Im Netz gibt es noch keine dekodierbaren Nachrichten!")
+        code = OptimalCode("\n".join(texts), max_length)
+        return code.to_text(), code.report(_bicoder.dict)
+
     def update_gui(self, on_keys=[]):
         """
         Updates the GUI with the current state.
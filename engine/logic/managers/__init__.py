@@ -1,3 +1,6 @@
 # engine/logic/managers/__init__.py
 from .file_manager import get_filemanager as filemanager
+from .watcher import get_watcher as watcher
+from .transport import get_transport as transport
+from . import broker, shared_ring  # Register the broker and shared memory transports
 from .settings import get_settings as settings
\ No newline at end of file
@@ -0,0 +1,666 @@
+import os
+import sys
+import time
+import select
+import socket
+import asyncio
+import threading
+from . import filemanager
+from .file_manager import FileManager, NetworkView
+from .message_index import MessageIndex
+from .transport import Transport, TRANSPORTS
+
+DEFAULT_ADDRESS = "127.0.0.1:47600"
+LINE_LIMIT = 1 << 24  # Longest accepted command line (in bytes)
+NETWORK_EXTENSION = ".net"  # Extension of the network files offered by the GUI
+
+
+def parse_address(address):
+    """
+    Splits a broker address into its kind and location.
+    Addresses containing a slash (or ending with ".sock") are Unix socket paths, all others are "host:port" pairs.
+
+    Parameters:
+        address (str): The address of the broker.
+
+    Returns:
+        tuple(str, str|tuple(str, int)): ("unix", path) or ("tcp", (host, port)).
+
+    Raises:
+        Warning: If the address is invalid.
+    """
+    if "/" in address or address.endswith(".sock"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise Warning("Netzwerk", "Unix-Sockets werden auf diesem System nicht unterstützt!")
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise Warning("Netzwerk", f"Ungültige Broker-Adresse \"{address}\"!")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class NetworkStream:
+    """
+    The canonical bit stream of one network on the broker, together with its subscribed clients.
+    """
+    def __init__(self, path, durability="group"):
+        """
+        Loads the network file into memory (the file is never created by the broker).
+
+        Parameters:
+            path (str): The path of the network file, which the stream is persisted to.
+            durability (str): The durability policy of the network file.
+
+        Raises:
+            OSError: If the network file does not exist or cannot be read.
+            Warning: If the file is not a network (it contains other characters than 0 and 1).
+        """
+        self.files = FileManager()  # Own instance: the broker must not move the fingerprint of the global one
+        self.files.update(network=path, create=False)
+        bits = self.files.load_network_file().encode("ascii", "replace")
+        if bits.translate(None, b"01"):
+            raise Warning("Netzwerk", f"{path} ist keine Netzwerkdatei!")
+        self.files.set_durability(durability)
+        self.bits = bytearray(bits)
+        self.subscribers = set()
+
+    def append(self, bits, divisor=0):
+        """
+        Appends bits to the stream and persists them according to the durability policy of the network file.
+        With "group", the file only queues the bits: they are published before they are written and are lost
+        if the broker stops before the next group commit (at most the commit window later).
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the stream is padded with 0s to a multiple of the divisor before the bits.
+
+        Returns:
+            int: The position of the first appended bit.
+
+        Raises:
+            OSError: If the network file cannot be written.
+        """
+        offset = len(self.bits)
+        chunk = ("0" * (-offset % divisor) if divisor else "") + bits
+        if chunk:
+            self.files.append_network(chunk)  # Already padded: the file has exactly the same content
+        self.bits += chunk.encode("ascii")  # Only after the file wrote (or, with group commits, queued) the bits
+        return offset
+
+
+class Broker:
+    """
+    Local broker holding the canonical bit streams of the networks in memory.
+
+    Clients subscribe to a network over a localhost TCP or Unix socket connection; every append is
+    written to the subscribers right away, so they neither poll nor re-read the network file.
+    The network files are still written (with group commits by default) to keep the networks across sessions;
+    with group commits, an append is sent to the subscribers before it is on disk.
+    While a broker serves a network, all clients of the network should use it instead of the file.
+
+    Only the networks the broker was started for are served, and otherwise existing network files
+    (with the extension of the network files of the GUI); the broker never creates a file.
+
+    Protocol (one ASCII line per command):
+        client: "HELLO <path>" subscribes to a network, "SEND <divisor> <bits>" appends to it.
+        broker: "FULL <bits>" (whole stream), "DATA <offset> <bits>" (append), "ACK <bits>" (own append done), "ERR <message>".
+    """
+    def __init__(self, address=DEFAULT_ADDRESS, durability="group", networks=()):
+        """
+        Initialize the broker.
+
+        Parameters:
+            address (str): The address to listen on ("host:port" or the path of a Unix socket).
+            durability (str): The durability policy of the network files.
+            networks (list): The paths of the networks the broker is started for.
+        """
+        self.address = address
+        self.durability = durability
+        self.networks = {os.path.abspath(os.path.normpath(path)) for path in networks}
+        self._streams = {}  # Network streams by path
+        self._clients = set()  # Writers of all connected clients
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def stream(self, path):
+        """
+        Returns the stream of a network, loading it on first use.
+
+        Parameters:
+            path (str): The path of the network file.
+
+        Returns:
+            NetworkStream: The stream of the network.
+
+        Raises:
+            OSError: If the network does not exist or cannot be read.
+            Warning: If the path is not a network the broker may serve.
+        """
+        path = os.path.abspath(os.path.normpath(path))
+        if path not in self.networks and not path.endswith(NETWORK_EXTENSION):
+            raise Warning("Netzwerk", f"{path} ist keine Netzwerkdatei!")
+        if path not in self._streams:
+            self._streams[path] = NetworkStream(path, self.durability)
+        return self._streams[path]
+
+    async def _handle(self, reader, writer):
+        """
+        Serves a single client connection.
+
+        Parameters:
+            reader (asyncio.StreamReader): The incoming data of the client.
+            writer (asyncio.StreamWriter): The outgoing data to the client.
+        """
+        stream = None
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode("ascii").rstrip("\r\n").partition(" ")
+                if command == "HELLO":
+                    if stream:
+                        stream.subscribers.discard(writer)
+                    try:
+                        stream = self.stream(argument)
+                    except (OSError, ValueError) as e:  # Missing, unreadable or not a text file
+                        stream = None
+                        writer.write(f"ERR Netzwerk nicht lesbar: {e}\n".encode("utf-8"))
+                    except Warning as w:
+                        stream = None
+                        writer.write(f"ERR {w.args[-1]}\n".encode("utf-8"))
+                    else:
+                        stream.subscribers.add(writer)
+                        writer.write(b"FULL " + stream.bits + b"\n")
+                elif command == "SEND" and stream:
+                    divisor, _, bits = argument.partition(" ")
+                    if not divisor.isdigit() or bits.strip("01"):
+                        writer.write(b"ERR Nur 0 und 1 erlaubt!\n")
+                    else:
+                        try:
+                            offset = stream.append(bits, int(divisor))
+                        except (OSError, Warning) as e:
+                            writer.write(f"ERR Netzwerk nicht beschreibbar: {e.args[-1]}\n".encode("utf-8"))
+                            await writer.drain()
+                            continue
+                        if len(stream.bits) > offset:
+                            data = b"DATA %d " % offset + stream.bits[offset:] + b"\n"
+                            for subscriber in stream.subscribers:
+                                subscriber.write(data)  # Slow subscribers are buffered, not waited for
+                        writer.write(b"ACK %d\n" % len(stream.bits))
+                else:
+                    writer.write(f"ERR Unbekannter Befehl \"{command}\"\n".encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, ValueError, UnicodeDecodeError):
+            pass  # Lost connection, overlong line or garbage: drop the client
+        finally:
+            if stream:
+                stream.subscribers.discard(writer)
+            self._clients.discard(writer)
+            writer.close()
+
+    async def serve(self):
+        """
+        Listens for clients until the broker is stopped.
+
+        Raises:
+            OSError: If the address is in use.
+        """
+        kind, location = parse_address(self.address)
+        self._loop = asyncio.get_running_loop()
+        if kind == "unix":
+            if os.path.exists(location):
+                # Remove a stale socket file, but never take over the socket of a running broker
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(location)
+                except OSError:
+                    os.unlink(location)
+                else:
+                    raise OSError(f"Broker läuft bereits unter {location}")
+                finally:
+                    probe.close()
+            self._server = await asyncio.start_unix_server(self._handle, location, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle, *location, limit=LINE_LIMIT)
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+        for stream in self._streams.values():
+            stream.files.flush_network()
+
+    def start_in_thread(self, timeout=5.0):
+        """
+        Runs the broker in a background thread of this process.
+
+        Parameters:
+            timeout (float): The time (in s) to wait for the broker to listen.
+
+        Raises:
+            OSError: If the broker cannot listen on its address.
+        """
+        started = threading.Event()
+        errors = []
+
+        async def run():
+            serving = asyncio.ensure_future(self.serve())
+            while self._server is None and not serving.done():
+                await asyncio.sleep(0.001)
+            started.set()
+            await serving
+
+        def target():
+            try:
+                asyncio.run(run())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+
+        self._thread = threading.Thread(target=target, name="ProtoBroker", daemon=True)
+        self._thread.start()
+        started.wait(timeout)
+        if errors:
+            raise OSError(*errors[0].args)
+
+    def _close(self):
+        """
+        Stops listening and disconnects all clients (in the event loop of the broker).
+        """
+        self._server.close()
+        for writer in list(self._clients):
+            writer.close()
+
+    def stop(self):
+        """
+        Stops a broker running in a background thread and writes the pending appends.
+        """
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._close)
+        if self._thread:
+            self._thread.join(5.0)
+            self._thread = None
+
+
+class BrokerTransport(Transport):
+    """
+    Exchanges the bit stream over a connection to a local broker, which pushes the appends of all clients.
+    If no broker is listening on the address, one is started in this process.
+    """
+    name = "broker"
+    reply_timeout = 5.0  # Time (in s) to wait for the broker to answer
+    poll_interval = 20  # Interval (in ms) of reading the connection if Tk cannot watch sockets
+    reconnect_delay = 500  # Time (in ms) before reconnecting after the connection was lost
+
+    def __init__(self, address=DEFAULT_ADDRESS, autostart=True):
+        """
+        Connects to the broker and loads the current network.
+
+        Parameters:
+            address (str): The address of the broker ("host:port" or the path of a Unix socket).
+            autostart (bool): Whether to start a broker in this process if none is listening.
+
+        Raises:
+            Warning: If the broker cannot be reached.
+        """
+        self.address = address
+        self.autostart = autostart
+        self._path = filemanager().network
+        self._sock = None
+        self._buffer = bytearray()  # Received data that does not form a complete line yet
+        self._content = bytearray()  # The network content received from the broker
+        self._delivered = 0  # Number of bits of the content that have been loaded
+        self._reset = True  # Whether the content was replaced since the last load
+        self._full = False  # Whether the whole stream was received after the last HELLO
+        self._acked = None
+        self._error = None
+        self._broker = None  # The broker started by this transport
+        self._index = None  # Message index of the last eol and code length
+        self._root = None
+        self._callback = None
+        self._job = None
+        self._connect()
+
+    # Connection
+
+    def _connect(self):
+        """
+        Connects to the broker (starting one if needed) and subscribes to the network.
+
+        Raises:
+            Warning: If the broker cannot be reached.
+        """
+        kind, location = parse_address(self.address)
+        family = socket.AF_UNIX if kind == "unix" else socket.AF_INET
+        for attempt in range(2):
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(self.reply_timeout)
+            try:
+                sock.connect(location)
+                break
+            except OSError:
+                sock.close()
+                if attempt or not self.autostart:
+                    raise Warning("Netzwerk", f"Broker unter \"{self.address}\" nicht erreichbar!")
+            try:
+                self._broker = Broker(self.address, networks=[self._path])
+                self._broker.start_in_thread()
+            except OSError:
+                self._broker = None  # Another client started a broker in the meantime
+        if family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._buffer = bytearray()
+        self._hello()
+        if self._root is not None:
+            self._register()
+
+    def _hello(self):
+        """
+        Subscribes to the current network and waits for its content.
+
+        Raises:
+            Warning: If the broker does not answer.
+        """
+        self._full = False
+        self._send_line(f"HELLO {self._path}")
+        self._wait(lambda: self._full)
+
+    def _ensure_connected(self):
+        """
+        Reconnects if the connection to the broker was lost.
+        """
+        if self._sock is None:
+            self._connect()
+
+    def _disconnect(self):
+        """
+        Closes the connection to the broker.
+        """
+        self._unregister()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _send_line(self, line):
+        """
+        Sends a command to the broker.
+
+        Parameters:
+            line (str): The command without the line break.
+
+        Raises:
+            Warning: If the connection is lost.
+        """
+        try:
+            self._sock.sendall(line.encode("utf-8") + b"\n")
+        except OSError:
+            self._disconnect()
+            raise Warning("Netzwerk", "Verbindung zum Broker verloren!")
+
+    def _wait(self, condition):
+        """
+        Reads from the broker until the condition is met.
+
+        Parameters:
+            condition (function): Returns True once the expected answer was received.
+
+        Raises:
+            Warning: If the broker reports an error, does not answer in time or the connection is lost.
+        """
+        deadline = time.monotonic() + self.reply_timeout
+        while not condition():
+            if self._error:
+                error, self._error = self._error, None
+                raise Warning("Netzwerk", error)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Warning("Netzwerk", "Der Broker antwortet nicht!")
+            self._receive(remaining)
+            if self._sock is None:
+                raise Warning("Netzwerk", "Verbindung zum Broker verloren!")
+
+    def _receive(self, timeout=0):
+        """
+        Reads and processes everything the broker has sent.
+
+        Parameters:
+            timeout (float): The time (in s) to wait for the first data.
+        """
+        while self._sock is not None:
+            ready, _, _ = select.select([self._sock], [], [], timeout)
+            if not ready:
+                return
+            try:
+                data = self._sock.recv(1 << 20)
+            except OSError:
+                data = b""
+            if not data:
+                self._disconnect()
+                return
+            self._buffer += data
+            self._process()
+            timeout = 0
+
+    def _process(self):
+        """
+        Processes the complete lines received from the broker.
+        """
+        start = 0
+        end = self._buffer.find(b"\n")
+        while end != -1:
+            line = self._buffer[start:end]
+            command, _, argument = bytes(line[:5]).partition(b" ")
+            if command == b"FULL":
+                self._content = line[5:]
+                self._reset = True
+                self._full = True
+            elif command == b"DATA":
+                offset, _, bits = bytes(line[5:]).partition(b" ")
+                if int(offset) == len(self._content):
+                    self._content += bits
+                elif int(offset) + len(bits) > len(self._content):
+                    self._send_line(f"HELLO {self._path}")  # Out of step: load the whole stream again
+            elif command == b"ACK":
+                self._acked = int(line[4:])
+            elif command == b"ERR":
+                self._error = line[4:].decode("utf-8", "replace")
+            start = end + 1
+            end = self._buffer.find(b"\n", start)
+        del self._buffer[:start]
+
+    # Transport interface
+
+    def send(self, bits, divisor=0):
+        """
+        Sends bits to the broker and waits until it acknowledges the append.
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the broker pads the stream with 0s to a multiple of the divisor before the bits.
+
+        Raises:
+            Warning: If the broker reports an error or cannot be reached.
+        """
+        self._ensure_connected()
+        self._acked = None
+        self._send_line(f"SEND {divisor or 0} {bits}")
+        self._wait(lambda: self._acked is not None)  # The own append has arrived before the acknowledgement
+
+    def compare(self):
+        """
+        Reads what the broker pushed and compares the received content with the loaded part.
+
+        Returns:
+            str: UNCHANGED, APPENDED or REWRITTEN (after a new FULL content).
+        """
+        self._ensure_connected()
+        self._receive()
+        if self._reset:
+            return self.REWRITTEN
+        return self.APPENDED if len(self._content) > self._delivered else self.UNCHANGED
+
+    def load_tail(self, change=None):
+        """
+        Returns the received bits that have not been loaded yet.
+
+        Parameters:
+            change (str): The result of a preceding compare() call, checked again if not given.
+
+        Returns:
+            tuple(str, bool): The loaded bits and whether they replace the previously loaded bits.
+        """
+        if change is None:
+            change = self.compare()
+        if change == self.UNCHANGED:
+            return "", False
+        rescan = self._reset or change == self.REWRITTEN
+        tail = self._content if rescan else self._content[self._delivered:]
+        self._reset = False
+        self._delivered = len(self._content)
+        return tail.decode("ascii"), rescan
+
+    def map(self):
+        """
+        Returns a view of a copy of the received content (the content grows while the view is in use).
+
+        Returns:
+            NetworkView: The view of the network content.
+        """
+        self._ensure_connected()
+        self._receive()
+        self._reset = False
+        self._delivered = len(self._content)
+        return NetworkView(bytes(self._content))
+
+    def message_index(self, eol, code_length, view):
+        """
+        Returns an index in memory (the broker clients have no network file of their own to put a sidecar next to).
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            view (NetworkView): The current network content.
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+        key = (eol, code_length)
+        if self._index is None or self._index[0] != key:
+            self._index = (key, MessageIndex("", eol, code_length))
+        return self._index[1].update(view)
+
+    def watch(self, root, callback):
+        """
+        Lets the Tk event loop read the connection and call back when the broker pushed new bits.
+
+        Parameters:
+            root: A Tk widget whose event loop reads the connection.
+            callback (function): The function to call when the network has changed.
+        """
+        self._root = root
+        self._callback = callback
+        self._register()
+
+    def follow(self, path):
+        """
+        Subscribes to another network on the same broker.
+
+        Parameters:
+            path (str): The path of the network file.
+        """
+        if path == self._path:
+            return
+        self._path = path
+        if self._sock is not None:
+            self._hello()
+
+    def close(self):
+        """
+        Disconnects from the broker and stops the broker started by this transport.
+        """
+        self._disconnect()
+        self._root = None
+        if self._broker:
+            self._broker.stop()
+            self._broker = None
+
+    # Tk event loop
+
+    def _register(self):
+        """
+        Lets the Tk event loop read the connection as soon as the broker pushes something.
+        """
+        self._unregister()
+        if self._sock is None:
+            return
+        if hasattr(self._root.tk, "createfilehandler") and sys.platform != "win32":
+            import tkinter as tk
+            self._root.tk.createfilehandler(self._sock, tk.READABLE, self._on_readable)
+            self._job = "filehandler"
+        else:
+            self._job = self._root.after(self.poll_interval, self._poll)
+
+    def _unregister(self):
+        """
+        Removes the connection from the Tk event loop.
+        """
+        if self._job == "filehandler":
+            self._root.tk.deletefilehandler(self._sock)
+        elif self._job:
+            self._root.after_cancel(self._job)
+        self._job = None
+
+    def _on_readable(self, *args):
+        """
+        Reads the pushed data and notifies about a change of the network.
+        """
+        self._receive()
+        if self._sock is None:
+            if self._root is not None:
+                self._root.after(self.reconnect_delay, self._reconnect)
+            return
+        if self._reset or len(self._content) > self._delivered:
+            self._callback()
+
+    def _poll(self):
+        """
+        Reads the connection periodically (if Tk cannot watch sockets).
+        """
+        self._job = None
+        self._on_readable()
+        if self._sock is not None and self._root is not None:
+            self._job = self._root.after(self.poll_interval, self._poll)
+
+    def _reconnect(self):
+        """
+        Tries to connect to the broker again after the connection was lost.
+        """
+        if self._root is None or self._sock is not None:
+            return
+        try:
+            self._connect()
+        except Warning:
+            self._root.after(self.reconnect_delay, self._reconnect)
+            return
+        self._callback()
+
+
+TRANSPORTS["broker"] = BrokerTransport
+
+
+def main():
+    """
+    Runs a broker in the foreground: python -m engine.logic.managers.broker [address] [network ...]
+    """
+    address = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ADDRESS
+    try:
+        asyncio.run(Broker(address, networks=sys.argv[2:]).serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
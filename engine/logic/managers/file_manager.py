@@ -1,11 +1,200 @@
 import os  # Import the os module for file operations
 import json
+import shutil
+import zlib
+import mmap
+import struct
+import time
+import threading
+from collections import namedtuple
+from .message_index import MessageIndex
+try:
+    import fcntl  # Advisory file locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+# Snapshot of the network file at the last load: stat values and a checksum of the last loaded bytes
+NetworkFingerprint = namedtuple("NetworkFingerprint", ["size", "mtime_ns", "ino", "tail_hash"])
+
+# Header of packed network files: magic, format version, number of bits
+PACKED_MAGIC = b"PTNB"
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct(">4sBQ")
+
+
+def pack_bits(bits):
+    """
+    Packs a string of 0s and 1s into bytes (8 bits per byte, the last byte is filled up with 0s).
+
+    Parameters:
+        bits (str): The bits to pack.
+
+    Returns:
+        bytes: The packed bits.
+    """
+    if not bits:
+        return b""
+    nbytes = (len(bits) + 7) // 8
+    return int(bits.ljust(nbytes * 8, "0"), 2).to_bytes(nbytes, "big")
+
+def unpack_bits(data, bitlength):
+    """
+    Unpacks bytes into a string of 0s and 1s.
+
+    Parameters:
+        data (bytes): The packed bits.
+        bitlength (int): The number of bits to unpack.
+
+    Returns:
+        str: The unpacked bits.
+    """
+    if not data:
+        return ""
+    return format(int.from_bytes(data, "big"), f"0{len(data) * 8}b")[:bitlength]
+
+class NetworkView:
+    """
+    Read-only view of the network content (one byte b"0" or b"1" per bit), e.g. backed by a memory map.
+
+    Lines are described by (offset, length) spans, so splitting and filtering work on the buffer
+    without copying; only the lines that are actually needed are materialised as strings.
+    """
+    def __init__(self, data, mapping=None):
+        """
+        Initialize the view.
+
+        Parameters:
+            data (mmap.mmap|bytes): The network content.
+            mapping (mmap.mmap): The memory map to close with the view, if any.
+        """
+        self._data = data
+        self._mapping = mapping
+        self.buffer = memoryview(data).toreadonly()
+
+    def __len__(self):
+        """
+        Returns the number of bits in the view.
+
+        Returns:
+            int: The number of bits.
+        """
+        return len(self._data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Releases the buffer and closes the memory map.
+        """
+        self.buffer.release()
+        if self._mapping is not None:
+            self._mapping.close()
+
+    def find(self, pattern, start=0):
+        """
+        Finds the next occurrence of a bit pattern.
+
+        Parameters:
+            pattern (str): The bits to find.
+            start (int): The position to start searching at.
+
+        Returns:
+            int: The position of the pattern or -1 if it is not found.
+        """
+        return self._data.find(pattern.encode("ascii"), start)
+
+    def line_spans(self, eol, code_length=0):
+        """
+        Splits the view at the end-of-line marker (in fixed-length mode only at block-aligned markers).
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+
+        Returns:
+            list(tuple(int, int)): The (offset, length) span of each line.
+        """
+        if not eol:
+            return [(0, len(self))]
+        spans = []
+        start = 0
+        pos = self.find(eol)
+        while pos != -1:
+            if code_length and pos % code_length:
+                pos = self.find(eol, pos + (-pos % code_length))  # Skip to the next block boundary
+                continue
+            spans.append((start, pos - start))
+            start = pos + len(eol)
+            pos = self.find(eol, start)
+        spans.append((start, len(self) - start))
+        return spans
+
+    def startswith(self, span, prefix):
+        """
+        Checks whether a line starts with the given bits.
+
+        Parameters:
+            span (tuple(int, int)): The (offset, length) span of the line.
+            prefix (str): The bits to check.
+
+        Returns:
+            bool: True if the line starts with the bits, False otherwise.
+        """
+        offset, length = span
+        return len(prefix) <= length and self.buffer[offset:offset + len(prefix)] == prefix.encode("ascii")
+
+    def endswith(self, span, suffix):
+        """
+        Checks whether a line ends with the given bits.
+
+        Parameters:
+            span (tuple(int, int)): The (offset, length) span of the line.
+            suffix (str): The bits to check.
+
+        Returns:
+            bool: True if the line ends with the bits, False otherwise.
+        """
+        offset, length = span
+        return len(suffix) <= length and self.buffer[offset + length - len(suffix):offset + length] == suffix.encode("ascii")
+
+    def text(self, span=None):
+        """
+        Materialises a line (or the whole view) as a string.
+
+        Parameters:
+            span (tuple(int, int)): The (offset, length) span of the line, or None for the whole view.
+
+        Returns:
+            str: The bits of the line.
+        """
+        if span is None:
+            return str(self.buffer, "ascii")
+        offset, length = span
+        return str(self.buffer[offset:offset + length], "ascii")
+
 
 # FilesManager class
 class FileManager:
     """
     Manages file operations for the application.
     """
+    # Kinds of changes of the network file since the last load
+    UNCHANGED = "unchanged"
+    APPENDED = "appended"
+    REWRITTEN = "rewritten"
+
+    # Durability policies for appends to the network file
+    DURABILITY_MODES = ("always", "group", "buffered")
+
+    # On-disk formats of the network file: one character per bit, or 8 bits per byte after a header
+    NETWORK_FORMATS = ("text", "packed")
+
+    MANIFEST_VERSION = 1  # Version of the manifest of segmented networks
+
     def __init__(self):
         """
         Initializes the FileManager with default values.
@@ -14,20 +203,110 @@ class FileManager:
         # Display the appli
         import os
         self.__network_path = os.path.join("data", "wan.net")  # Default path for the network file
-        self._last_checked_timestamp = 0
+        self._fingerprint = None  # Fingerprint of the network file at the last load
+        self._network_format = "text"  # Format of the network file at the last load
+        self._network_offset = 0  # Number of bits of the network file that have already been loaded
+        self._network_tail = b""  # Last loaded bytes of the network file (for the tail hash)
+        self._sealed_bits = 0  # Number of loaded bits in sealed segments (segmented networks only)
+        self._segment_size = 0  # Number of bits after which the live file is sealed (0 = not segmented)
+        self.compact_after = 0  # Number of sealed segments that are merged into the archive (0 = never)
+        self.tail_check = 64  # Number of loaded bytes that are re-read to detect rewrites (0 = off)
+        self._index = None  # Message index of the last network path, eol and code length
+
+        # Durability of appends
+        self.__durability = "always"
+        self.commit_window = 0.05  # Time (in s) in which appends are collected in the "group" mode
+        self._pending = []  # Appends waiting for the next group commit: (text, divisor, time of the append)
+        self._commit_timer = None
+        self._commit_lock = threading.Lock()
+        self._commit_error = None  # Warning of a failed group commit, reported on the next check_commit
+        self._commit_stats = {"commits": 0, "appends": 0, "last_latency": 0.0, "total_latency": 0.0}
 
     
-    def update(self, network=""):
+    def update(self, network="", create=True):
         """
         Updates the network path.
 
+        Appends still waiting for a group commit are written to the old network first.
+
         Parameters:
             network (str): The new network path.
+            create (bool): Whether to create the network file if it does not exist.
+
+        Raises:
+            Warning: If the waiting appends cannot be written (the network is not changed then).
+            FileNotFoundError: If the network file does not exist and may not be created.
         """
         if network:
-            self.__network_path = os.path.abspath(os.path.normpath(network))
+            path = os.path.abspath(os.path.normpath(network))
+            if not create and not os.path.isfile(path):
+                raise FileNotFoundError(f"Netzwerkdatei {path} existiert nicht")
+            self.flush_network()
+            self.__network_path = path
             self._ensure_file_exists(self.__network_path)  # Ensure the selected file exists
-            self._last_checked_timestamp = 0
+            self._fingerprint = None
+            self._network_offset = 0
+            self._sealed_bits = 0
+            self._segment_size = 0
+            self._read_manifest()  # Sets the segment size of a segmented network
+
+    def set_durability(self, mode, window=None):
+        """
+        Sets the durability policy for appends to the network file.
+
+        Parameters:
+            mode (str): "always" (write and fsync each append), "group" (collect appends within the commit window
+                and write them with a single write and fsync) or "buffered" (write each append without fsync).
+            window (float): The commit window in seconds for the "group" mode (unchanged if not given).
+
+        Returns:
+            str: The new durability mode.
+
+        Raises:
+            Warning: If the mode is unknown.
+        """
+        if mode not in self.DURABILITY_MODES:
+            raise Warning("Netzwerk", f"Unbekannter Speichermodus \"{mode}\"!")
+        if window is not None:
+            self.commit_window = window
+        self.__durability = mode
+        if mode != "group":
+            self.flush_network()  # Do not keep collected appends waiting
+        return self.__durability
+
+    @property
+    def durability(self):
+        """
+        Returns the current durability policy.
+
+        Returns:
+            str: The current durability mode.
+        """
+        return self.__durability
+
+    @property
+    def commit_stats(self):
+        """
+        Returns statistics about the commits to the network file.
+
+        Returns:
+            dict: The number of commits and appends, and the last and mean commit latency in seconds
+                (time from an append call until its data was written).
+        """
+        stats = dict(self._commit_stats)
+        total = stats.pop("total_latency")
+        stats["mean_latency"] = total / stats["appends"] if stats["appends"] else 0.0
+        return stats
+
+    @property
+    def network_format(self):
+        """
+        Returns the format of the network file at the last load.
+
+        Returns:
+            str: "text" or "packed".
+        """
+        return self._network_format
 
     @property
     def network(self):
@@ -81,23 +360,576 @@ class FileManager:
         Returns:
             bool: True if the network file has been changed, False otherwise.
         """
+        return self.compare_network() != self.UNCHANGED
+
+    def compare_network(self):
+        """
+        Compares the network file with its fingerprint at the last load.
+
+        Size, modification time (in ns) and inode are compared first. If they differ, the last loaded bytes
+        are re-read and compared with their checksum to tell a pure append from a rewrite.
+        Packed files are always compared by the bit length in their header, as appending a few bits
+        does not necessarily change the file size.
+
+        Returns:
+            str: UNCHANGED, APPENDED or REWRITTEN.
+        """
         try:
-            current_timestamp = os.path.getmtime(self.__network_path)  # Get the current last-modified timestamp of the file 
-            return current_timestamp != self._last_checked_timestamp                
+            st = os.stat(self.__network_path)
         except FileNotFoundError:
             self._ensure_file_exists(self.__network_path)
-            self._last_checked_timestamp = 0
-            return True  # Consider file creation a 'change'
+            self._fingerprint = None
+            return self.REWRITTEN  # Consider file creation a 'change'
+        old = self._fingerprint
+        if old is None:
+            return self.REWRITTEN  # Nothing loaded yet
+        packed = self._network_format == "packed"
+        if not packed and (st.st_size, st.st_mtime_ns, st.st_ino) == old[:3]:
+            return self.UNCHANGED
+        if st.st_ino != old.ino:
+            return self.APPENDED if self._rotated(old, st) else self.REWRITTEN  # Sealed or replaced
+        if st.st_size < old.size:
+            return self.REWRITTEN  # Shrunk
+        with open(self.__network_path, "rb") as f:
+            if packed:
+                bitlength = self._read_header(f.read(PACKED_HEADER.size))
+                if bitlength is None or bitlength < self._network_offset:
+                    return self.REWRITTEN  # Converted or shrunk
+                stable_end = PACKED_HEADER.size + self._network_offset // 8  # Complete bytes never change on appends
+            else:
+                bitlength = st.st_size
+                stable_end = self._network_offset
+            if self.tail_check and old.tail_hash is not None:
+                f.seek(stable_end - len(self._network_tail))
+                if zlib.crc32(f.read(len(self._network_tail))) != old.tail_hash:
+                    return self.REWRITTEN  # The already loaded content was modified
+        if bitlength == self._network_offset:
+            # Only touched: remember the new timestamp, so the file is not checked again
+            self._fingerprint = old._replace(mtime_ns=st.st_mtime_ns)
+            return self.UNCHANGED
+        return self.APPENDED
+
+    def _read_header(self, head):
+        """
+        Reads the header of a packed network file.
+
+        Parameters:
+            head (bytes): The first bytes of the file.
+
+        Returns:
+            int|None: The number of bits in the file, or None if the file is not packed.
+
+        Raises:
+            Warning: If the file was packed with an unknown format version.
+        """
+        if len(head) < PACKED_HEADER.size or not head.startswith(PACKED_MAGIC):
+            return None
+        _, version, bitlength = PACKED_HEADER.unpack(head[:PACKED_HEADER.size])
+        if version != PACKED_VERSION:
+            raise Warning("Netzwerk", f"Unbekannte Version {version} des gepackten Netzformats!")
+        return bitlength
+
+    def _read_network(self, f, start):
+        """
+        Reads the network content of an open file from the given bit position on.
+
+        Parameters:
+            f (file): The network file opened in binary mode.
+            start (int): The number of bits to skip.
+
+        Returns:
+            tuple(str, str, bytes): The bits, the format of the file and the read bytes that will not change on appends.
+        """
+        f.seek(0)
+        bitlength = self._read_header(f.read(PACKED_HEADER.size))
+        if bitlength is None:
+            f.seek(start)
+            raw = f.read()
+            return raw.decode("utf-8"), "text", raw
+        first = start // 8
+        f.seek(PACKED_HEADER.size + first)
+        raw = f.read((bitlength + 7) // 8 - first)
+        bits = unpack_bits(raw, bitlength - first * 8)[start % 8:]
+        return bits, "packed", raw[:bitlength // 8 - first]
+
+    def _remember_load(self, st, fmt, nbits, stable, replace):
+        """
+        Updates the fingerprint after (a part of) the network file was loaded.
+
+        Parameters:
+            st (os.stat_result): The stat values of the file taken before reading.
+            fmt (str): The format of the file.
+            nbits (int): The number of loaded bits.
+            stable (bytes): The loaded bytes that will not change on appends.
+            replace (bool): Whether the content replaces (True) or extends (False) the previously loaded content.
+        """
+        if replace:
+            self._network_offset = 0
+            self._network_tail = b""
+        self._network_format = fmt
+        self._network_offset += nbits  # Remember where the next tail read has to start
+        self._network_tail = (self._network_tail + stable[-self.tail_check:])[-self.tail_check:] if self.tail_check else b""
+        tail_hash = zlib.crc32(self._network_tail) if self.tail_check else None
+        if fmt == "packed":
+            size = PACKED_HEADER.size + (self._network_offset + 7) // 8
+        else:
+            size = self._network_offset
+        self._fingerprint = NetworkFingerprint(size, st.st_mtime_ns, st.st_ino, tail_hash)
 
     def load_network_file(self):
         """
-        Loads the content of the network file.
+        Loads the content of the network file (text or packed format).
+        For segmented networks, the sealed segments are loaded before the live file.
 
         Returns:
             str: The content of the network file.
         """
-        self._last_checked_timestamp = os.path.getmtime(self.__network_path)
-        return self.load_file(self.__network_path)
+        for attempt in range(10):
+            manifest = self._read_manifest()
+            try:
+                sealed = self._read_sealed(manifest, 0) if manifest else ""
+            except FileNotFoundError:
+                if attempt == 9:
+                    raise
+                continue  # Compacted in the meantime
+            with open(self.__network_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if manifest and manifest["live_ino"] != st.st_ino and attempt < 9:
+                    continue  # Sealed in the meantime
+                bits, fmt, stable = self._read_network(f, 0)
+            break
+        self._sealed_bits = len(sealed)
+        self._remember_load(st, fmt, len(bits), stable, replace=True)
+        return sealed + bits
+
+    def map_network(self):
+        """
+        Loads the network file as a read-only view instead of a string.
+        Text networks are memory-mapped without copying, packed and segmented networks are unpacked once.
+
+        Returns:
+            NetworkView: The view of the network content (to be closed after use).
+        """
+        if self._read_manifest():
+            return NetworkView(self.load_network_file().encode("ascii"))
+        with open(self.__network_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if not st.st_size:
+                self._sealed_bits = 0
+                self._remember_load(st, "text", 0, b"", replace=True)
+                return NetworkView(b"")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # Stays valid after closing the file
+        self._sealed_bits = 0
+        bitlength = self._read_header(mapping[:PACKED_HEADER.size])
+        if bitlength is None:
+            view = NetworkView(mapping, mapping)
+            self._remember_load(st, "text", len(view), mapping[-self.tail_check:] if self.tail_check else b"", replace=True)
+            return view
+        raw = mapping[PACKED_HEADER.size:PACKED_HEADER.size + (bitlength + 7) // 8]
+        mapping.close()
+        self._remember_load(st, "packed", bitlength, raw[:bitlength // 8], replace=True)
+        return NetworkView(unpack_bits(raw, bitlength).encode("ascii"))
+
+    def message_index(self, eol, code_length=0, view=None):
+        """
+        Returns the index of the message boundaries in the network, updated to the current content.
+        The index is kept in a sidecar file next to the network file (one per network) and shared with
+        the other clients; if the sidecar cannot be written, an index in memory is used instead.
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            view (NetworkView): The current network content (mapped and closed again if not given).
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+        key = (self.__network_path, eol, code_length)
+        if self._index is None or self._index[0] != key:
+            # Only one index is kept: another eol or code length replaces it (and rebuilds the sidecar)
+            self._index = (key, MessageIndex(self.__network_path if eol else "", eol, code_length))
+        if view is None:
+            with self.map_network() as view:
+                return self.message_index(eol, code_length, view)
+        try:
+            return self._index[1].update(view)
+        except OSError:
+            self._index = (key, MessageIndex("", eol, code_length))  # e.g. no write access next to the network
+            return self._index[1].update(view)
+
+    def network_length(self):
+        """
+        Returns the number of bits in the network (sealed segments included) without loading it.
+
+        Returns:
+            int: The number of bits.
+        """
+        manifest = self._read_manifest()
+        with open(self.__network_path, "rb") as f:
+            bitlength = self._read_header(f.read(PACKED_HEADER.size))
+            if bitlength is None:
+                bitlength = os.fstat(f.fileno()).st_size
+        return bitlength + (manifest["sealed_bits"] if manifest else 0)
+
+    def load_network_range(self, span):
+        """
+        Loads a part of the network file without loading the whole file.
+        For segmented networks, only the segments containing the part are opened.
+
+        Parameters:
+            span (tuple(int, int)): The (offset, length) span of the bits to load, e.g. a message from the message index.
+
+        Returns:
+            str: The loaded bits.
+        """
+        offset, length = span
+        manifest = self._read_manifest()
+        sealed_bits = manifest["sealed_bits"] if manifest else 0
+        bits = ""
+        if offset < sealed_bits:
+            bits = self._read_sealed(manifest, offset, min(offset + length, sealed_bits))
+            length -= len(bits)
+            offset += len(bits)
+            if length <= 0:
+                return bits
+        with open(self.__network_path, "rb") as f:
+            return bits + self._read_range(f, offset - sealed_bits, length)
+
+    def _read_range(self, f, offset, length):
+        """
+        Reads a part of an open network file (text or packed format).
+
+        Parameters:
+            f (file): The network file opened in binary mode.
+            offset (int): The position of the first bit.
+            length (int): The number of bits to read.
+
+        Returns:
+            str: The read bits.
+        """
+        f.seek(0)
+        bitlength = self._read_header(f.read(PACKED_HEADER.size))
+        if bitlength is None:
+            f.seek(offset)
+            return f.read(length).decode("utf-8")
+        length = max(0, min(length, bitlength - offset))
+        f.seek(PACKED_HEADER.size + offset // 8)
+        raw = f.read((offset % 8 + length + 7) // 8)
+        return unpack_bits(raw, offset % 8 + length)[offset % 8:]
+
+    def load_network_tail(self, change=None):
+        """
+        Loads only the content that was appended to the network file since the last load.
+        Falls back to loading the whole file if the file was rewritten in the meantime.
+        If the live file of a segmented network was sealed, only the new segments are read.
+
+        Parameters:
+            change (str): The result of a preceding compare_network() call, checked again if not given.
+
+        Returns:
+            tuple(str, bool): The loaded content and whether it replaces (True) or extends (False) the previously loaded content.
+        """
+        if change is None:
+            change = self.compare_network()
+        if change == self.REWRITTEN:
+            return self.load_network_file(), True
+        if change == self.UNCHANGED:
+            return "", False
+        with open(self.__network_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            sealed = ""
+            if st.st_ino != self._fingerprint.ino:
+                # The loaded live file was sealed: read the rest of it (and further sealed segments) from the segments
+                manifest = self._read_manifest()
+                if not (manifest and manifest["live_ino"] == st.st_ino and self._rotated(self._fingerprint, st)):
+                    return self.load_network_file(), True
+                try:
+                    sealed = self._read_sealed(manifest, self._sealed_bits + self._network_offset)
+                except FileNotFoundError:
+                    return self.load_network_file(), True  # Compacted in the meantime
+                self._sealed_bits = manifest["sealed_bits"]
+                self._network_offset = 0
+                self._network_tail = b""
+            bits, fmt, stable = self._read_network(f, self._network_offset)
+        if fmt != self._network_format and not sealed:
+            return self.load_network_file(), True  # Converted in the meantime
+        self._remember_load(st, fmt, len(bits), stable, replace=False)
+        return sealed + bits, False
+
+    # Segmented networks
+
+    def _segment_dir(self):
+        """
+        Returns the directory of the sealed segments and the manifest of the network.
+
+        Returns:
+            str: The path of the segment directory.
+        """
+        return self.__network_path + ".segments"
+
+    def _read_manifest(self):
+        """
+        Reads the manifest of a segmented network.
+
+        Returns:
+            dict|None: The manifest, or None if the network is not segmented.
+        """
+        try:
+            with open(os.path.join(self._segment_dir(), "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        self._segment_size = manifest["segment_size"]
+        return manifest
+
+    def _write_manifest(self, manifest):
+        """
+        Replaces the manifest of a segmented network atomically.
+
+        Parameters:
+            manifest (dict): The new manifest.
+        """
+        path = os.path.join(self._segment_dir(), "manifest.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _sealed_files(self, manifest):
+        """
+        Lists the files of the sealed part of a segmented network in order.
+
+        Parameters:
+            manifest (dict): The manifest of the network.
+
+        Returns:
+            list(tuple(str, int, int)): The path, the position of the first bit and the number of bits of each file.
+        """
+        files = []
+        if manifest["archive"]:
+            files.append((os.path.join(self._segment_dir(), manifest["archive"]["file"]), 0, manifest["archive"]["bits"]))
+        for segment in manifest["segments"]:
+            files.append((os.path.join(self._segment_dir(), segment["file"]), segment["start"], segment["bits"]))
+        return files
+
+    def _read_sealed(self, manifest, start, end=None):
+        """
+        Reads bits from the sealed part of a segmented network, opening only the files that contain them.
+
+        Parameters:
+            manifest (dict): The manifest of the network.
+            start (int): The position of the first bit.
+            end (int): The position after the last bit (the end of the sealed part if not given).
+
+        Returns:
+            str: The read bits.
+
+        Raises:
+            FileNotFoundError: If a segment was removed by a compaction in the meantime.
+        """
+        end = manifest["sealed_bits"] if end is None else end
+        parts = []
+        for path, first, bits in self._sealed_files(manifest):
+            if first + bits <= start or first >= end:
+                continue
+            low = max(start, first) - first
+            high = min(end, first + bits) - first
+            with open(path, "rb") as f:
+                parts.append(self._read_range(f, low, high - low))
+        return "".join(parts)
+
+    def _rotated(self, old, st):
+        """
+        Checks if the loaded live file was sealed (and nothing else changed).
+
+        Parameters:
+            old (NetworkFingerprint): The fingerprint of the loaded live file.
+            st (os.stat_result): The stat values of the current live file.
+
+        Returns:
+            bool: True if the loaded live file is now a sealed segment starting after the loaded sealed bits.
+        """
+        manifest = self._read_manifest()
+        if not manifest or manifest["live_ino"] != st.st_ino:
+            return False
+        return any(segment["ino"] == old.ino and segment["start"] == self._sealed_bits and segment["bits"] >= self._network_offset
+                   for segment in manifest["segments"])
+
+    def set_segment_size(self, bits):
+        """
+        Turns the network into a segmented network: as soon as the live network file holds the given number of bits,
+        it is sealed as an immutable segment and a new, empty live file is started.
+        Refreshes then only read the live file, while the sealed segments are only opened for full reloads.
+
+        Parameters:
+            bits (int): The number of bits per segment (0 stops sealing new segments).
+
+        Returns:
+            int: The new segment size.
+
+        Raises:
+            Warning: If the segment size is invalid.
+        """
+        if not isinstance(bits, int) or bits < 0:
+            raise Warning("Netzwerk", "Ungültige Segmentgröße!")
+        fd = self._open_locked()
+        try:
+            manifest = self._read_manifest()
+            if manifest is None:
+                if not bits:
+                    return 0
+                os.makedirs(self._segment_dir(), exist_ok=True)
+                manifest = {"version": self.MANIFEST_VERSION, "segment_size": 0, "sealed_bits": 0, "next": 1,
+                            "live_ino": os.fstat(fd).st_ino, "archive": None, "segments": []}
+            manifest["segment_size"] = bits
+            self._write_manifest(manifest)
+            self._segment_size = bits
+        finally:
+            self._unlock(fd)
+            os.close(fd)
+        return bits
+
+    @property
+    def segment_size(self):
+        """
+        Returns the number of bits per segment of the network.
+
+        Returns:
+            int: The segment size, or 0 if the network is not segmented.
+        """
+        return self._segment_size
+
+    def set_compact_after(self, count):
+        """
+        Sets the number of sealed segments after which this client merges them into the archive when it seals a segment.
+
+        Parameters:
+            count (int): The number of segments (0 never merges them).
+
+        Returns:
+            int: The new number of segments.
+
+        Raises:
+            Warning: If the number is invalid.
+        """
+        if not isinstance(count, int) or count < 0:
+            raise Warning("Netzwerk", "Ungültige Anzahl Segmente für das Zusammenfassen!")
+        self.compact_after = count
+        return self.compact_after
+
+    def _seal(self, fd, manifest, bitlength, packed):
+        """
+        Seals the locked live file as a new segment and starts a new, empty live file.
+
+        Parameters:
+            fd (int): The file descriptor of the locked live file.
+            manifest (dict): The current manifest.
+            bitlength (int): The number of bits in the live file.
+            packed (bool): Whether the live file is packed.
+        """
+        name = f"{manifest['next']:06d}.seg"
+        path = os.path.join(self._segment_dir(), name)
+        try:
+            os.link(self.__network_path, path)  # The live file itself becomes the segment
+        except OSError:
+            shutil.copyfile(self.__network_path, path)
+        tmppath = self.__network_path + ".tmp"
+        with open(tmppath, "wb") as f:
+            f.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, 0) if packed else b"")
+            f.flush()
+            os.fsync(f.fileno())
+            live_ino = os.fstat(f.fileno()).st_ino
+        # The inode of the sealed live file (not of a copy), so clients that loaded it recognise the rotation
+        manifest["segments"].append({"file": name, "start": manifest["sealed_bits"], "bits": bitlength, "ino": os.fstat(fd).st_ino})
+        manifest["sealed_bits"] += bitlength
+        manifest["next"] += 1
+        manifest["live_ino"] = live_ino  # Readers retry until the live file matches the manifest
+        self._write_manifest(manifest)
+        os.replace(tmppath, self.__network_path)  # Clients waiting for the lock notice the new inode
+        if self.compact_after and len(manifest["segments"]) >= self.compact_after:
+            self._compact(manifest)
+
+    def compact_network(self):
+        """
+        Merges all sealed segments of a segmented network into a single packed archive file.
+        """
+        fd = self._open_locked()
+        try:
+            manifest = self._read_manifest()
+            if manifest and manifest["segments"]:
+                self._compact(manifest)
+        finally:
+            self._unlock(fd)
+            os.close(fd)
+
+    def _compact(self, manifest):
+        """
+        Merges the sealed segments into the archive (the live file has to be locked).
+
+        Parameters:
+            manifest (dict): The current manifest.
+        """
+        bits = self._read_sealed(manifest, 0)
+        name = f"archive-{manifest['next']:06d}.seg"
+        manifest["next"] += 1
+        path = os.path.join(self._segment_dir(), name)
+        with open(path, "wb") as f:
+            f.write(PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(bits)) + pack_bits(bits))
+            f.flush()
+            os.fsync(f.fileno())
+        old_files = [path for path, _, _ in self._sealed_files(manifest)]
+        manifest["archive"] = {"file": name, "bits": len(bits)}
+        manifest["segments"] = []
+        self._write_manifest(manifest)
+        for path in old_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Still opened by a reader (Windows): removed with the next compaction
+
+    def convert_network(self, fmt):
+        """
+        Converts the network file into the given format (e.g. to migrate a text network to the packed format).
+        All clients read both formats and append in the format the file has.
+
+        Parameters:
+            fmt (str): "text" or "packed".
+
+        Returns:
+            str: The new format.
+
+        Raises:
+            Warning: If the format is unknown.
+        """
+        if fmt not in self.NETWORK_FORMATS:
+            raise Warning("Netzwerk", f"Unbekanntes Netzformat \"{fmt}\"!")
+        self.flush_network()
+        fd = self._open_locked()
+        try:
+            with open(fd, "rb", closefd=False) as f:
+                bits, current, _ = self._read_network(f, 0)
+            if current == fmt:
+                return fmt
+            if fmt == "packed":
+                data = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(bits)) + pack_bits(bits)
+            else:
+                data = bits.encode("utf-8")
+            tmppath = self.__network_path + ".tmp"
+            with open(tmppath, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            manifest = self._read_manifest()
+            if manifest:
+                manifest["live_ino"] = os.stat(tmppath).st_ino
+                self._write_manifest(manifest)
+            os.replace(tmppath, self.__network_path)  # Clients waiting for the lock notice the new inode
+        finally:
+            self._unlock(fd)
+            os.close(fd)
+        self._fingerprint = None
+        return fmt
 
     def load_json(self, filepath):
         """
@@ -126,30 +958,211 @@ class FileManager:
         Raises:
             FileNotFoundError: If the network file does not exist.
         """
-        with open(self.__network_path, "r+", encoding="utf-8") as f:
-            content = f.read()
-            while len(content) % divisor != 0:  # Ensure bit length is a multiple of divisor
-                content += "0"
-            f.seek(0)
-            f.write(content)
-            f.truncate()
+        self.append_network("", divisor)
 
     def append_network(self, text, divisor=0):
         """
-        Appends text to the network file.
+        Appends text to the network file according to the durability policy.
 
         Parameters:
             text (str): The text to append to the network file.
+            divisor (int): If given, the file is padded with 0s to a multiple of the divisor before the text.
 
         Raises:
             FileNotFoundError: If the network file does not exist.
         """
-        if divisor:
-            self.pad_network(divisor)
-        with open(self.__network_path, "a", encoding="utf-8") as f:
-            f.write(text)
-            f.flush()               # empties python buffers into the OS buffers
-            os.fsync(f.fileno())    # empties OS buffers into the disk
+        entry = (text, divisor, time.perf_counter())
+        if self.__durability != "group":
+            self._commit([entry], fsync=self.__durability == "always")
+            return
+        with self._commit_lock:
+            self._pending.append(entry)
+            if self._commit_timer is None:  # First append of a new group: commit at the end of the window
+                self._commit_timer = threading.Timer(self.commit_window, self._timed_flush)
+                self._commit_timer.start()
+
+    def flush_network(self):
+        """
+        Writes all appends collected in the "group" mode to the network file at once.
+        If writing fails, the appends are kept and written with the next commit.
+
+        Raises:
+            Warning: If the appends cannot be written.
+        """
+        with self._commit_lock:
+            entries, self._pending = self._pending, []
+            if self._commit_timer is not None:
+                self._commit_timer.cancel()
+                self._commit_timer = None
+        if not entries:
+            return
+        try:
+            self._commit(entries, fsync=True)
+        except OSError as e:
+            with self._commit_lock:
+                self._pending[:0] = entries  # Keep the messages for the next attempt
+            raise Warning("Netzwerk", f"Nachrichten konnten nicht gespeichert werden ({e}), sie werden beim nächsten Senden erneut geschrieben!")
+
+    def _timed_flush(self):
+        """
+        Writes the collected appends at the end of the commit window (in the timer thread).
+        A failure is kept for check_commit, since the thread cannot show it.
+        """
+        try:
+            self.flush_network()
+        except Warning as w:
+            self._commit_error = w
+
+    def check_commit(self):
+        """
+        Reports a group commit that failed in the timer thread (once).
+
+        Raises:
+            Warning: If the last group commit failed.
+        """
+        error, self._commit_error = self._commit_error, None
+        if error is not None:
+            raise error
+
+    def _commit(self, entries, fsync):
+        """
+        Writes appends to the network file.
+
+        The padding to a multiple of the divisor is computed from the file size (or the bit length
+        in the header of packed files) alone and written together with the texts in a single write,
+        while an advisory lock keeps other clients from appending in between.
+
+        Parameters:
+            entries (list): The appends to write as (text, divisor, time of the append) tuples.
+            fsync (bool): Whether to empty the OS buffers into the disk.
+
+        Raises:
+            FileNotFoundError: If the network file does not exist.
+        """
+        fd = self._open_locked()
+        try:
+            bitlength = self._read_header(self._pread(fd, PACKED_HEADER.size, 0))
+            size = os.fstat(fd).st_size if bitlength is None else bitlength  # Includes everything other clients appended before we got the lock
+            manifest = self._read_manifest()
+            sealed_bits = manifest["sealed_bits"] if manifest else 0
+            size += sealed_bits  # Pad relative to the whole network, not only to the live file
+            chunks = []
+            for text, divisor, _ in entries:
+                padding = "0" * (-size % divisor) if divisor else ""
+                chunks.append(padding + text)
+                size += len(padding) + len(text)
+            if bitlength is None:
+                self._write_all(fd, "".join(chunks).encode("utf-8"))
+            else:
+                # Rewrite the last, incomplete byte together with the new bits, then update the header
+                first = PACKED_HEADER.size + bitlength // 8
+                partial = unpack_bits(self._pread(fd, 1, first), bitlength % 8) if bitlength % 8 else ""
+                fd = self._positioned(fd)
+                os.lseek(fd, first, os.SEEK_SET)
+                self._write_all(fd, pack_bits(partial + "".join(chunks)))
+                os.lseek(fd, 0, os.SEEK_SET)
+                self._write_all(fd, PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, size - sealed_bits))
+            if fsync:
+                os.fsync(fd)    # empties OS buffers into the disk
+            if manifest and manifest["segment_size"] and size - sealed_bits >= manifest["segment_size"]:
+                self._seal(fd, manifest, size - sealed_bits, packed=bitlength is not None)
+        finally:
+            self._unlock(fd)
+            os.close(fd)
+        done = time.perf_counter()
+        self._commit_stats["commits"] += 1
+        self._commit_stats["appends"] += len(entries)
+        self._commit_stats["last_latency"] = done - entries[0][2]
+        self._commit_stats["total_latency"] += sum(done - entry[2] for entry in entries)
+
+    def _open_locked(self):
+        """
+        Opens the network file for appending and locks it.
+        If the file was replaced (e.g. converted) while waiting for the lock, the new file is opened instead.
+
+        Returns:
+            int: The file descriptor of the locked network file.
+
+        Raises:
+            FileNotFoundError: If the network file does not exist.
+        """
+        while True:
+            fd = os.open(self.__network_path, os.O_RDWR | os.O_APPEND | getattr(os, "O_BINARY", 0))
+            self._lock(fd)
+            if os.fstat(fd).st_ino == os.stat(self.__network_path).st_ino:
+                return fd
+            self._unlock(fd)
+            os.close(fd)
+
+    def _positioned(self, fd):
+        """
+        Makes a file descriptor of the locked network file write at the current position instead of appending.
+
+        Parameters:
+            fd (int): The file descriptor opened for appending.
+
+        Returns:
+            int: A file descriptor that writes at the current position.
+        """
+        if fcntl:
+            fcntl.fcntl(fd, fcntl.F_SETFL, fcntl.fcntl(fd, fcntl.F_GETFL) & ~os.O_APPEND)
+            return fd
+        # Without fcntl there is no lock to lose, so the file can simply be reopened
+        os.close(fd)
+        return os.open(self.__network_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+
+    def _pread(self, fd, length, offset):
+        """
+        Reads bytes at the given position without changing the file position.
+
+        Parameters:
+            fd (int): The file descriptor to read from.
+            length (int): The number of bytes to read.
+            offset (int): The position to read from.
+
+        Returns:
+            bytes: The read bytes.
+        """
+        if hasattr(os, "pread"):
+            return os.pread(fd, length, offset)
+        position = os.lseek(fd, 0, os.SEEK_CUR)
+        os.lseek(fd, offset, os.SEEK_SET)
+        data = os.read(fd, length)
+        os.lseek(fd, position, os.SEEK_SET)
+        return data
+
+    def _lock(self, fd):
+        """
+        Takes an exclusive advisory lock on the file (waits until other clients release it).
+        Without fcntl (e.g. on Windows) only the atomicity of the single append is relied on.
+
+        Parameters:
+            fd (int): The file descriptor of the file to lock.
+        """
+        if fcntl:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+
+    def _unlock(self, fd):
+        """
+        Releases the advisory lock on the file.
+
+        Parameters:
+            fd (int): The file descriptor of the locked file.
+        """
+        if fcntl:
+            fcntl.lockf(fd, fcntl.LOCK_UN)
+
+    def _write_all(self, fd, data):
+        """
+        Writes all data to the file descriptor (os.write may write less than requested).
+
+        Parameters:
+            fd (int): The file descriptor to write to.
+            data (bytes): The data to write.
+        """
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
 
     def save_file(self, filepath, text):
         """
@@ -0,0 +1,269 @@
+import os
+import sys
+import zlib
+import struct
+from array import array
+from bisect import bisect_right
+try:
+    import fcntl  # Advisory file locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+# Header of an index file: magic, format version, checksum of the eol and code length, generation,
+# number of indexed bits, checksum of the last indexed bits
+INDEX_MAGIC = b"PTIX"
+INDEX_VERSION = 2
+INDEX_HEADER = struct.Struct(">4sBIIQI")
+CHECK_BITS = 64  # Number of bits before the end of the indexed range that are compared to detect rewrites
+
+
+class MessageIndex:
+    """
+    Index of the message boundaries (positions of the end-of-line markers) in a network.
+
+    The index is stored in a single sidecar file next to the network file and is shared by all clients:
+    each update only scans the bits that were appended since the last update. The sidecar belongs to one
+    end-of-line marker and code length; an index for another one rebuilds it. Messages can then be accessed directly instead of splitting the whole network.
+    """
+    def __init__(self, network_path, eol, code_length=0):
+        """
+        Initialize the index for a network.
+
+        Parameters:
+            network_path (str): The path of the network file, or an empty string for an index in memory only.
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+        """
+        self.eol = eol
+        self.code_length = code_length or 0
+        self.path = f"{network_path}.idx" if network_path else ""
+        self.key = zlib.crc32(f"{eol}-{self.code_length}".encode("ascii"))  # Identifies the eol and code length in the sidecar
+        self._offsets = array("Q")  # Positions of the end-of-line markers
+        self._bits = 0  # Number of indexed bits
+        self._check_value = 0  # Checksum of the last indexed bits
+        self._generation = None  # Changes whenever the index file is rebuilt
+
+    def update(self, view):
+        """
+        Brings the index up to date with the network content.
+
+        Parameters:
+            view (NetworkView): The current network content.
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+        if not self.path:
+            self._scan(view, self._check(view))
+            return self
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+            with open(fd, "r+b", closefd=False) as f:
+                self._read(f, view)
+                count = len(self._offsets)
+                self._scan(view, self._bits)
+                # Append the new boundaries, then commit them by updating the header
+                f.seek(INDEX_HEADER.size + 8 * count)
+                f.write(self._to_bytes(self._offsets[count:]))
+                f.truncate()
+                f.seek(0)
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.key, self._generation, self._bits, self._check_value))
+        finally:
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        return self
+
+    def _read(self, f, view):
+        """
+        Reads the boundaries that other clients added to the index file since the last update.
+        Rebuilds the index if the file is invalid, belongs to another eol or code length, or does not match
+        the network content anymore (including an index of more bits than the view, e.g. after the network shrank).
+
+        Parameters:
+            f (file): The locked index file.
+            view (NetworkView): The current network content.
+        """
+        head = f.read(INDEX_HEADER.size)
+        if len(head) == INDEX_HEADER.size and head.startswith(INDEX_MAGIC):
+            _, version, key, generation, bits, check = INDEX_HEADER.unpack(head)
+            valid = version == INDEX_VERSION and key == self.key and bits <= len(view) and check == self._checksum(view, bits)
+        else:
+            valid = False
+        if not valid:
+            # Unknown format, another eol or code length, or the network was rewritten or shrunk: start a new generation
+            self._reset(struct.unpack(">I", os.urandom(4))[0])
+            return
+        if generation != self._generation:
+            self._reset(generation)
+        f.seek(INDEX_HEADER.size + 8 * len(self._offsets))
+        new = array("Q", f.read())
+        if sys.byteorder == "little":
+            new.byteswap()
+        self._offsets.extend(new)
+        self._bits = bits
+
+    def _reset(self, generation):
+        """
+        Empties the index.
+
+        Parameters:
+            generation (int): The generation of the index file.
+        """
+        self._offsets = array("Q")
+        self._bits = 0
+        self._check_value = 0
+        self._generation = generation
+
+    def _check(self, view):
+        """
+        Checks if the in-memory index still matches the network content.
+
+        Parameters:
+            view (NetworkView): The current network content.
+
+        Returns:
+            int: The number of valid indexed bits (0 if the index was reset).
+        """
+        if self._bits > len(view) or self._checksum(view, self._bits) != self._check_value:
+            self._reset(None)
+        return self._bits
+
+    def _scan(self, view, start):
+        """
+        Finds the end-of-line markers in the bits that were appended after the indexed range.
+
+        Parameters:
+            view (NetworkView): The current network content.
+            start (int): The number of already indexed bits.
+        """
+        eol = self.eol
+        length = len(view)
+        if eol:
+            last_end = self._offsets[-1] + len(eol) if self._offsets else 0
+            # A marker can only start after the last marker and may overlap the end of the indexed range
+            pos = max(last_end, start - len(eol) + 1)
+            if self.code_length:
+                pos += -pos % self.code_length  # Markers only count at block boundaries
+            pos = view.find(eol, pos)
+            while pos != -1:
+                if self.code_length and pos % self.code_length:
+                    pos = view.find(eol, pos + (-pos % self.code_length))
+                    continue
+                self._offsets.append(pos)
+                pos = view.find(eol, pos + len(eol))
+        self._bits = length
+        self._check_value = self._checksum(view, length)
+
+    def _checksum(self, view, bits):
+        """
+        Computes the checksum of the last bits before the given position.
+
+        Parameters:
+            view (NetworkView): The network content.
+            bits (int): The end of the checked range.
+
+        Returns:
+            int: The checksum.
+        """
+        start = max(0, bits - CHECK_BITS)
+        return zlib.crc32(view.buffer[start:bits])
+
+    def _to_bytes(self, offsets):
+        """
+        Converts boundary positions into their big-endian representation in the index file.
+
+        Parameters:
+            offsets (array): The positions to convert.
+
+        Returns:
+            bytes: The converted positions.
+        """
+        offsets = array("Q", offsets)
+        if sys.byteorder == "little":
+            offsets.byteswap()
+        return offsets.tobytes()
+
+    def __len__(self):
+        """
+        Returns the number of messages (the unfinished message after the last marker included).
+
+        Returns:
+            int: The number of messages.
+        """
+        return len(self._offsets) + 1
+
+    def span(self, k):
+        """
+        Returns the position of a message.
+
+        Parameters:
+            k (int): The number of the message (negative numbers count from the end).
+
+        Returns:
+            tuple(int, int): The (offset, length) span of the message.
+
+        Raises:
+            IndexError: If there is no such message.
+        """
+        count = len(self)
+        if k < 0:
+            k += count
+        if not 0 <= k < count:
+            raise IndexError(k)
+        start = self._offsets[k - 1] + len(self.eol) if k else 0
+        end = self._offsets[k] if k < len(self._offsets) else self._bits
+        return (start, end - start)
+
+    def spans(self, first=0, last=None):
+        """
+        Returns the positions of a range of messages.
+
+        Parameters:
+            first (int): The number of the first message.
+            last (int): The number after the last message (all messages up to the end if not given).
+
+        Returns:
+            list(tuple(int, int)): The (offset, length) spans of the messages.
+        """
+        first, last, _ = slice(first, last).indices(len(self))
+        return [self.span(k) for k in range(first, last)]
+
+    def last(self, n):
+        """
+        Returns the positions of the last messages.
+
+        Parameters:
+            n (int): The number of messages.
+
+        Returns:
+            list(tuple(int, int)): The (offset, length) spans of the messages.
+        """
+        return self.spans(max(0, len(self) - n))
+
+    def page(self, number, size):
+        """
+        Returns the positions of the messages on a page.
+
+        Parameters:
+            number (int): The number of the page (starting at 0).
+            size (int): The number of messages per page.
+
+        Returns:
+            list(tuple(int, int)): The (offset, length) spans of the messages.
+        """
+        return self.spans(number * size, (number + 1) * size)
+
+    def locate(self, bit):
+        """
+        Finds the message that contains a bit.
+
+        Parameters:
+            bit (int): The position of the bit.
+
+        Returns:
+            int: The number of the message.
+        """
+        return bisect_right(self._offsets, bit)
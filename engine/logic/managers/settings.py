@@ -1,4 +1,5 @@
-from . import filemanager
+from . import filemanager, transport
+from .transport import select_transport
 from .. import bicoder, filter, signature, stats, progress
 import json
 
@@ -33,7 +34,7 @@ class ProtoSettings:
         Returns:
             list: List of keys to be used for data collection and export.
         """
-        keys = ["code_dict", "network", "eol", "filter", "signature", "code_length"] + list(self._config_data)
+        keys = ["code_dict", "network", "durability", "eol", "filter", "signature", "charset", "code_length", "compression"] + list(self._config_data)
         if user:
             keys += list(self._user_data)
         return keys
@@ -58,10 +59,28 @@ class ProtoSettings:
                 continue
             elif x=="network":
                 filemanager().update(network=data[x])
+                transport().follow(filemanager().network)
+            elif x=="durability":
+                filemanager().set_durability(mode=data[x])
+            elif x=="network_format":
+                filemanager().convert_network(fmt=data[x])
+            elif x=="segment_size":
+                filemanager().set_segment_size(bits=data[x])
+            elif x=="compact_after":
+                filemanager().set_compact_after(count=data[x])
+            elif x=="transport":
+                options = {"address": data["broker"]} if data[x] == "broker" and data.get("broker") else {}
+                select_transport(data[x], **options)
+            elif x=="broker":
+                continue  # Address of the broker, used together with "transport"
             elif x=="eol":
                 bicoder().update_eol(eol=data[x])
+            elif x=="charset":
+                bicoder().update_charset(charset=data[x])
             elif x=="code_length":
                 bicoder().update_code_length(code_length=data[x])
+            elif x=="compression":
+                bicoder().update_compression(compression=data[x])
             elif x=="code_text":
                 bicoder().parse(code_text=data[x])
             elif x=="code_dict":
@@ -130,14 +149,30 @@ class ProtoSettings:
                 continue
             elif x=="network":
                 data[x] = filemanager().network
+            elif x=="durability":
+                data[x] = filemanager().durability
+            elif x=="network_format":
+                data[x] = filemanager().network_format
+            elif x=="segment_size":
+                data[x] = filemanager().segment_size
+            elif x=="compact_after":
+                data[x] = filemanager().compact_after
+            elif x=="transport":
+                data[x] = transport().name
+            elif x=="broker":
+                data[x] = getattr(transport(), "address", "")
             elif x=="eol":
                 data[x] = bicoder().eol
             elif x=="code_text":
                 data[x] = bicoder().dict_to_text()
             elif x=="code_dict":
                 data[x] = bicoder().dict
+            elif x=="charset":
+                data[x] = bicoder().charset
             elif x=="code_length":
                 data[x] = bicoder().code_length
+            elif x=="compression":
+                data[x] = bicoder().compression
             elif x=="filter":
                 data[x] = filter().get()
             elif x=="signature":
@@ -174,6 +209,8 @@ class ProtoSettings:
         if "code_dict" in keys:
             keys.remove("code_dict")
             keys.append("code_text")
+        if "charset" in keys:
+            keys.append("code_length")
         if "code_length" in keys:
             keys.append("code_text")
             keys.append("eol")
@@ -0,0 +1,521 @@
+import os
+import time
+import struct
+import hashlib
+import tempfile
+import threading
+from multiprocessing import shared_memory
+from . import filemanager
+from .file_manager import FileManager
+from .transport import Transport, TRANSPORTS
+try:
+    import fcntl  # Advisory file locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+# Layout of the shared memory block: header fields at fixed positions, followed by the ring of bits (one byte per bit)
+RING_MAGIC = b"PTSM"
+RING_VERSION = 1
+MAGIC_AT = 0        # 4s: magic
+VERSION_AT = 4      # B: layout version
+GENERATION_AT = 8   # I: changes whenever the ring is reset, so readers notice that their position is invalid
+USERS_AT = 12       # I: number of attached instances
+CAPACITY_AT = 16    # Q: number of bits in the ring
+SEQUENCE_AT = 24    # Q: sequence counter, odd while a writer changes the ring
+HEAD_AT = 32        # Q: position (in the whole network) after the last bit written into the ring
+PERSISTED_AT = 40   # Q: position after the last bit written to the network file
+DATA_AT = 64
+
+
+class SharedRing:
+    """
+    Ring buffer of the latest bits of a network in shared memory, used by all instances on the same host.
+
+    Positions are counted from the start of the network, so the bit at position p is stored at p % capacity.
+    Writers serialize on a lock file and bracket every change with the sequence counter (odd while writing);
+    readers copy the bits between their own position and the head without any lock and retry if the
+    counter changed meanwhile. Bits that are not in the network file yet are spilled to it by the writers.
+    """
+    capacity = 1 << 22  # Number of bits the ring holds (one byte each) before older bits are overwritten
+    retries = 100  # Number of lock-free read attempts before the reader takes the lock
+
+    def __init__(self, path, capacity=None):
+        """
+        Attaches to the ring of a network, creating it if no instance did so yet.
+
+        Parameters:
+            path (str): The path of the network file.
+            capacity (int): The number of bits in the ring if it is created.
+
+        Raises:
+            OSError: If the shared memory cannot be created.
+        """
+        self.path = os.path.abspath(os.path.normpath(path))
+        self.name = "pt_" + hashlib.sha1(os.fsencode(self.path)).hexdigest()[:24]
+        self.files = FileManager()  # Own instance for spilling: the global one keeps its fingerprint
+        self.files.update(network=self.path)
+        self.files.set_durability("buffered" if filemanager().durability == "buffered" else "always")  # Spills are the group commits
+        self._thread_lock = threading.RLock()  # File locks only exclude other processes
+        # Everyone who may write the network file may use its ring (e.g. other accounts on a terminal server)
+        self.mode = os.stat(self.path).st_mode & 0o666
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), self.name + ".lock"), os.O_RDWR | os.O_CREAT, self.mode)
+        self._share(self._lock_fd)
+        with self.locked():
+            try:
+                self._shm = self._open(create=False)
+            except FileNotFoundError:
+                self._shm = self._open(create=True, size=DATA_AT + (capacity or self.capacity))
+                self._share(getattr(self._shm, "_fd", -1))
+                self._reset(self.files.network_length())
+            self.buffer = self._shm.buf
+            if self._get("4s", MAGIC_AT) != RING_MAGIC or self._get("B", VERSION_AT) != RING_VERSION:
+                raise OSError(f"Ungültiger gemeinsamer Speicher {self.name}")
+            self.capacity = self._get("Q", CAPACITY_AT)
+            if self._get("Q", PERSISTED_AT) != self.files.network_length():
+                self._reset(self.files.network_length())  # The file was changed while no instance was attached
+            else:
+                self._spill()  # Write what a crashed instance left behind
+            self._set("I", USERS_AT, self._get("I", USERS_AT) + 1)
+
+    def _open(self, create, size=0):
+        """
+        Opens the shared memory block without registering it for removal at the exit of this process
+        (the last attached instance removes it instead).
+
+        Parameters:
+            create (bool): Whether to create the block.
+            size (int): The size of the block to create.
+
+        Returns:
+            SharedMemory: The opened block.
+        """
+        try:
+            return shared_memory.SharedMemory(self.name, create=create, size=size, track=False)
+        except TypeError:  # Python < 3.13 always registers the block
+            shm = shared_memory.SharedMemory(self.name, create=create, size=size)
+            self._tracked(shm, False)
+            return shm
+
+    def _share(self, fd):
+        """
+        Gives a file created by this instance the permissions of the network file, regardless of the umask.
+        Files of other accounts are left as they are.
+
+        Parameters:
+            fd (int): The file descriptor of the lock file or shared memory block (-1 if there is none, e.g. on Windows).
+        """
+        if fd < 0 or not hasattr(os, "fchmod"):
+            return
+        try:
+            if os.fstat(fd).st_uid == os.getuid():
+                os.fchmod(fd, self.mode)
+        except OSError:
+            pass
+
+    def _tracked(self, shm, track):
+        """
+        Registers or unregisters a block for removal at the exit of this process (Python < 3.13 only).
+
+        Parameters:
+            shm (SharedMemory): The block.
+            track (bool): Whether to register (True) or unregister (False) the block.
+        """
+        try:
+            from multiprocessing import resource_tracker
+            (resource_tracker.register if track else resource_tracker.unregister)(shm._name, "shared_memory")
+        except (ImportError, AttributeError):
+            pass
+
+    def _get(self, fmt, offset):
+        return struct.unpack_from("<" + fmt, self.buffer, offset)[0]
+
+    def _set(self, fmt, offset, value):
+        struct.pack_into("<" + fmt, self.buffer, offset, value)
+
+    def _reset(self, head):
+        """
+        Empties the ring and starts a new generation at the given position (lock held).
+
+        Parameters:
+            head (int): The number of bits in the network file.
+        """
+        self.buffer = self._shm.buf
+        self._set("4s", MAGIC_AT, RING_MAGIC)
+        self._set("B", VERSION_AT, RING_VERSION)
+        self._set("I", GENERATION_AT, struct.unpack("<I", os.urandom(4))[0])
+        self._set("Q", CAPACITY_AT, len(self.buffer) - DATA_AT)
+        self._set("Q", HEAD_AT, head)
+        self._set("Q", PERSISTED_AT, head)
+
+    def locked(self):
+        """
+        Returns a context manager holding the writer lock of the ring.
+
+        Returns:
+            _RingLock: The lock.
+        """
+        return _RingLock(self)
+
+    @property
+    def head(self):
+        """
+        Returns the position after the last bit in the ring.
+
+        Returns:
+            int: The position.
+        """
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """
+        Reads the generation and the head consistently.
+
+        Returns:
+            tuple(int, int): The generation and the head.
+        """
+        for _ in range(self.retries):
+            sequence = self._get("Q", SEQUENCE_AT)
+            if sequence % 2 == 0:
+                generation, head = self._get("I", GENERATION_AT), self._get("Q", HEAD_AT)
+                if self._get("Q", SEQUENCE_AT) == sequence:
+                    return generation, head
+            time.sleep(0)
+        with self.locked():
+            return self._get("I", GENERATION_AT), self._get("Q", HEAD_AT)
+
+    def read(self, generation, start):
+        """
+        Copies the bits from a position up to the head.
+
+        Parameters:
+            generation (int): The generation the position belongs to.
+            start (int): The position of the first bit.
+
+        Returns:
+            tuple(bytes, int)|None: The bits and the new head, or None if the position is not in the ring anymore.
+        """
+        for attempt in range(self.retries + 1):
+            if attempt == self.retries:
+                self._thread_lock.acquire()  # Writers are too busy: read under the lock
+                self._lock_file()
+            try:
+                sequence = self._get("Q", SEQUENCE_AT)
+                if sequence % 2 and attempt < self.retries:
+                    continue
+                head = self._get("Q", HEAD_AT)
+                if self._get("I", GENERATION_AT) != generation or start > head or head - start > self.capacity:
+                    return None
+                data = self._copy(start, head)
+                if attempt == self.retries or self._get("Q", SEQUENCE_AT) == sequence:
+                    return data, head
+            finally:
+                if attempt == self.retries:
+                    self._unlock_file()
+                    self._thread_lock.release()
+            time.sleep(0)
+
+    def _copy(self, start, end):
+        """
+        Copies bits out of the ring (without checking if they are still in it).
+
+        Parameters:
+            start (int): The position of the first bit.
+            end (int): The position after the last bit.
+
+        Returns:
+            bytes: The bits.
+        """
+        first = DATA_AT + start % self.capacity
+        if end - start <= DATA_AT + self.capacity - first:
+            return bytes(self.buffer[first:first + end - start])
+        split = DATA_AT + self.capacity - first
+        return bytes(self.buffer[first:]) + bytes(self.buffer[DATA_AT:DATA_AT + end - start - split])
+
+    def append(self, bits, divisor=0):
+        """
+        Appends bits to the ring (lock held by the caller).
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the network is padded with 0s to a multiple of the divisor before the bits.
+        """
+        head = self._get("Q", HEAD_AT)
+        chunk = (("0" * (-head % divisor) if divisor else "") + bits).encode("ascii")
+        if head + len(chunk) - self._get("Q", PERSISTED_AT) > self.capacity:
+            self._spill()  # The unspilled bits would be overwritten
+        if len(chunk) > self.capacity:
+            # Too long for the ring: write it to the file directly, readers will load the file again
+            self.files.append_network(chunk.decode("ascii"))
+            self._set("Q", SEQUENCE_AT, self._get("Q", SEQUENCE_AT) + 1)
+            self._set("Q", HEAD_AT, head + len(chunk))
+            self._set("Q", PERSISTED_AT, head + len(chunk))
+            self._set("Q", SEQUENCE_AT, self._get("Q", SEQUENCE_AT) + 1)
+            return
+        self._set("Q", SEQUENCE_AT, self._get("Q", SEQUENCE_AT) + 1)
+        first = head % self.capacity
+        part = min(len(chunk), self.capacity - first)
+        self.buffer[DATA_AT + first:DATA_AT + first + part] = chunk[:part]
+        self.buffer[DATA_AT:DATA_AT + len(chunk) - part] = chunk[part:]
+        self._set("Q", HEAD_AT, head + len(chunk))
+        self._set("Q", SEQUENCE_AT, self._get("Q", SEQUENCE_AT) + 1)
+
+    def spill(self):
+        """
+        Writes the bits that are only in the ring to the network file.
+        """
+        with self.locked():
+            self._spill()
+
+    def _spill(self):
+        """
+        Writes the bits that are only in the ring to the network file (lock held).
+        """
+        persisted, head = self._get("Q", PERSISTED_AT), self._get("Q", HEAD_AT)
+        if head > persisted:
+            self.files.append_network(self._copy(persisted, head).decode("ascii"))
+            self._set("Q", PERSISTED_AT, head)
+
+    def close(self):
+        """
+        Detaches from the ring. The last instance spills the remaining bits and removes the shared memory.
+        """
+        with self.locked():
+            users = max(0, self._get("I", USERS_AT) - 1)
+            self._set("I", USERS_AT, users)
+            if not users:
+                self._spill()
+            self.buffer = None
+            self._shm.close()
+            if not users:
+                try:
+                    if getattr(self._shm, "_track", True):
+                        self._tracked(self._shm, True)  # unlink() unregisters it again
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+        os.close(self._lock_fd)
+
+    def _lock_file(self):
+        if fcntl:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX)
+
+    def _unlock_file(self):
+        if fcntl:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN)
+
+
+class _RingLock:
+    """
+    Context manager holding the writer lock of a ring (in this process and against other processes).
+    """
+    def __init__(self, ring):
+        self.ring = ring
+
+    def __enter__(self):
+        self.ring._thread_lock.acquire()
+        self.ring._lock_file()
+        return self.ring
+
+    def __exit__(self, *args):
+        self.ring._unlock_file()
+        self.ring._thread_lock.release()
+
+
+class SharedMemoryTransport(Transport):
+    """
+    Exchanges the bit stream through a ring buffer in shared memory with the other instances on the same host.
+    New bits are read from memory instead of the network file; the file is written after a short delay.
+    """
+    name = "shared_memory"
+    poll_interval = 50  # Interval (in ms) of checking the ring in the Tk event loop
+    spill_delay = 0.05  # Time (in s) after an append before the ring is spilled to the network file
+
+    def __init__(self, capacity=None):
+        """
+        Attaches to the ring of the current network.
+
+        Parameters:
+            capacity (int): The number of bits in the ring if it is created.
+
+        Raises:
+            Warning: If the shared memory cannot be used.
+        """
+        self.capacity = capacity
+        self._ring = None
+        self._generation = None  # Generation of the ring at the last load
+        self._position = 0  # Position after the last loaded bit
+        self._spill_timer = None
+        self._root = None
+        self._callback = None
+        self._job = None
+        self._attach(filemanager().network)
+
+    def _attach(self, path):
+        """
+        Attaches to the ring of a network.
+
+        Parameters:
+            path (str): The path of the network file.
+
+        Raises:
+            Warning: If the shared memory cannot be used.
+        """
+        try:
+            self._ring = SharedRing(path, self.capacity)
+        except OSError as e:
+            raise Warning("Netzwerk", f"Gemeinsamer Speicher nicht verfügbar: {e}")
+        self._generation = None
+
+    def _detach(self):
+        """
+        Detaches from the ring, spilling pending bits first.
+        """
+        if self._spill_timer is not None:
+            self._spill_timer.cancel()
+            self._spill_timer = None
+        if self._ring is not None:
+            self._ring.spill()
+            self._ring.close()
+            self._ring = None
+
+    def send(self, bits, divisor=0):
+        """
+        Appends bits to the ring and schedules spilling them to the network file.
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the network is padded with 0s to a multiple of the divisor before the bits.
+        """
+        with self._ring.locked():
+            self._ring.append(bits, divisor)
+        if self._spill_timer is None:
+            self._spill_timer = threading.Timer(self.spill_delay, self._spill)
+            self._spill_timer.daemon = True
+            self._spill_timer.start()
+
+    def _spill(self):
+        """
+        Writes the ring to the network file (called by the spill timer).
+        """
+        self._spill_timer = None
+        ring = self._ring
+        if ring is not None:
+            try:
+                ring.spill()
+            except (OSError, TypeError):
+                pass  # Detached in the meantime: spilled when detaching
+
+    def compare(self):
+        """
+        Compares the head and generation of the ring with the loaded position.
+
+        Returns:
+            str: UNCHANGED, APPENDED or REWRITTEN (also if the ring was overrun since the last load).
+        """
+        generation, head = self._ring.snapshot()
+        if generation != self._generation or head - self._position > self._ring.capacity or head < self._position:
+            return self.REWRITTEN
+        return self.APPENDED if head > self._position else self.UNCHANGED
+
+    def load_tail(self, change=None):
+        """
+        Copies the bits appended since the last load out of the ring, or loads everything from the file.
+
+        Parameters:
+            change (str): The result of a preceding compare() call, checked again if not given.
+
+        Returns:
+            tuple(str, bool): The loaded bits and whether they replace the previously loaded bits.
+        """
+        if change is None:
+            change = self.compare()
+        if change == self.UNCHANGED:
+            return "", False
+        if change == self.APPENDED:
+            data = self._ring.read(self._generation, self._position)
+            if data is not None:
+                bits, self._position = data
+                return bits.decode("ascii"), False
+        with self.map() as view:  # Rewritten or overrun: load everything
+            return view.text(), True
+
+    def map(self):
+        """
+        Spills the ring and maps the network file, which then holds the whole content.
+
+        Returns:
+            NetworkView: The view of the network content.
+        """
+        ring = self._ring
+        with ring.locked():
+            ring._spill()  # The network file then holds exactly the content of the ring
+            view = filemanager().map_network()
+            self._generation, self._position = ring._get("I", GENERATION_AT), ring._get("Q", HEAD_AT)
+        return view
+
+    def message_index(self, eol, code_length, view):
+        """
+        Returns the index in the sidecar file of the network (the view is a map of the network file).
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            view (NetworkView): The current network content.
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+        return filemanager().message_index(eol, code_length, view)
+
+    def watch(self, root, callback):
+        """
+        Starts checking the ring in the Tk event loop.
+
+        Parameters:
+            root: A Tk widget whose event loop checks the ring.
+            callback (function): The function to call when the network has changed.
+        """
+        self._root = root
+        self._callback = callback
+        if self._job:
+            root.after_cancel(self._job)
+        self._job = root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """
+        Checks the head of the ring (a memory read) and notifies about a change of the network.
+        """
+        self._job = None
+        if self._ring is None or self._root is None:
+            return
+        if self.compare() != self.UNCHANGED:
+            self._callback()
+        self._job = self._root.after(self.poll_interval, self._poll)
+
+    def follow(self, path):
+        """
+        Detaches from the ring of the current network and attaches to the ring of another one.
+
+        Parameters:
+            path (str): The path of the network file.
+
+        Raises:
+            Warning: If the shared memory cannot be used.
+        """
+        if self._ring is not None and os.path.abspath(os.path.normpath(path)) == self._ring.path:
+            return
+        self._detach()
+        self._attach(path)
+
+    def close(self):
+        """
+        Stops checking the ring and detaches from it, spilling pending bits first.
+        """
+        if self._job:
+            self._root.after_cancel(self._job)
+            self._job = None
+        self._root = None
+        self._detach()
+
+
+TRANSPORTS["shared_memory"] = SharedMemoryTransport
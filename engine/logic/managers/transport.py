@@ -0,0 +1,265 @@
+import atexit
+from abc import ABC, abstractmethod
+from . import filemanager, watcher
+from .file_manager import FileManager
+
+
+class Transport(ABC):
+    """
+    Base class of the ways a client exchanges the bit stream of a network with the other clients.
+
+    A transport delivers the network content to the flow (completely or only the newly appended bits)
+    and sends new bits into the network. Subclasses implement the abstract methods; watching,
+    following another network and closing do nothing unless overridden.
+    """
+    # Kinds of changes of the network since the last load
+    UNCHANGED = FileManager.UNCHANGED
+    APPENDED = FileManager.APPENDED
+    REWRITTEN = FileManager.REWRITTEN
+
+    name = ""
+
+    @abstractmethod
+    def send(self, bits, divisor=0):
+        """
+        Appends bits to the network.
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the network is padded with 0s to a multiple of the divisor before the bits.
+        """
+
+    @abstractmethod
+    def compare(self):
+        """
+        Checks how the network changed since the last load.
+
+        Returns:
+            str: UNCHANGED, APPENDED or REWRITTEN.
+        """
+
+    @abstractmethod
+    def load_tail(self, change=None):
+        """
+        Loads the bits that were appended since the last load (or everything if the network was rewritten).
+
+        Parameters:
+            change (str): The result of a preceding compare() call, checked again if not given.
+
+        Returns:
+            tuple(str, bool): The loaded bits and whether they replace (True) or extend (False) the previously loaded bits.
+        """
+
+    @abstractmethod
+    def map(self):
+        """
+        Loads the whole network as a read-only view.
+
+        Returns:
+            NetworkView: The view of the network content (to be closed after use).
+        """
+
+    @abstractmethod
+    def message_index(self, eol, code_length, view):
+        """
+        Returns the index of the message boundaries in the network.
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            view (NetworkView): The current network content.
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+
+    def watch(self, root, callback):
+        """
+        Starts posting change events of the network into the Tk event loop.
+
+        Parameters:
+            root: A Tk widget whose event loop the change events are posted into.
+            callback (function): The function to call when the network has changed.
+        """
+
+    def follow(self, path):
+        """
+        Switches to another network file.
+
+        Parameters:
+            path (str): The path of the network file.
+        """
+
+    def notify_activity(self):
+        """
+        Informs the transport that the network is about to change (e.g. after sending a message).
+        """
+
+    def close(self):
+        """
+        Stops the transport.
+        """
+
+
+class FileTransport(Transport):
+    """
+    Exchanges the bit stream by appending to and re-reading a shared network file (default).
+    """
+    name = "file"
+
+    def send(self, bits, divisor=0):
+        """
+        Appends bits to the network file (according to the durability policy of the file manager).
+
+        Parameters:
+            bits (str): The bits to append.
+            divisor (int): If given, the file is padded with 0s to a multiple of the divisor before the bits.
+        """
+        filemanager().append_network(bits, divisor)
+
+    def compare(self):
+        """
+        Compares the network file with its fingerprint at the last load.
+
+        Returns:
+            str: UNCHANGED, APPENDED or REWRITTEN.
+        """
+        return filemanager().compare_network()
+
+    def load_tail(self, change=None):
+        """
+        Reads the bits appended to the network file since the last load.
+
+        Parameters:
+            change (str): The result of a preceding compare() call, checked again if not given.
+
+        Returns:
+            tuple(str, bool): The loaded bits and whether they replace the previously loaded bits.
+        """
+        return filemanager().load_network_tail(change)
+
+    def map(self):
+        """
+        Maps the network file into memory.
+
+        Returns:
+            NetworkView: The view of the network content.
+        """
+        return filemanager().map_network()
+
+    def message_index(self, eol, code_length, view):
+        """
+        Returns the index kept in the sidecar file of the network.
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            view (NetworkView): The current network content.
+
+        Returns:
+            MessageIndex: The updated index.
+        """
+        return filemanager().message_index(eol, code_length, view)
+
+    def watch(self, root, callback):
+        """
+        Starts the network watcher (inotify or polling).
+
+        Parameters:
+            root: A Tk widget whose event loop the change events are posted into.
+            callback (function): The function to call when the network file has changed.
+        """
+        watcher().start(root, callback)
+
+    def follow(self, path):
+        """
+        Lets the watcher watch another network file.
+
+        Parameters:
+            path (str): The path of the network file.
+        """
+        watcher().follow(path)
+
+    def notify_activity(self):
+        """
+        Lets a polling watcher check again soon.
+        """
+        watcher().notify_activity()
+
+    def close(self):
+        """
+        Stops the network watcher.
+        """
+        watcher().stop()
+
+
+TRANSPORTS = {"file": FileTransport}  # Transport classes by name, further backends register here
+
+_transport = None
+_watching = None  # Tk widget and callback of the change events, passed on to new transports
+def get_transport():
+    """
+    Returns the global transport.
+    If the instance does not exist, the file transport is created.
+
+    Returns:
+        Transport: The global transport.
+    """
+    global _transport
+    if _transport is None:
+        _transport = FileTransport()
+    return _transport
+
+def select_transport(name, **options):
+    """
+    Replaces the global transport.
+
+    Parameters:
+        name (str): The name of the transport (e.g. "file" or "broker").
+        options: Options of the transport (e.g. the address of the broker).
+
+    Returns:
+        Transport: The new global transport.
+
+    Raises:
+        Warning: If the transport is unknown or cannot be started.
+    """
+    global _transport
+    if name not in TRANSPORTS:
+        raise Warning("Netzwerk", f"Unbekannte Übertragungsart \"{name}\"!")
+    new = TRANSPORTS[name](**options)
+    if _transport is not None:
+        _transport.close()
+    _transport = new
+    if _watching:
+        _transport.watch(*_watching)
+    return _transport
+
+def close_transport():
+    """
+    Closes the global transport and writes the appends still waiting for a group commit
+    (called when the window is closed and at the exit of the program).
+    """
+    global _transport, _watching
+    _watching = None
+    if _transport is not None:
+        _transport.close()
+        _transport = None
+    try:
+        filemanager().flush_network()
+    except Warning as w:
+        print(f"Achtung: {w.args[-1]}")
+
+atexit.register(close_transport)
+
+def watch_transport(root, callback):
+    """
+    Starts posting change events of the network into the Tk event loop, also for transports selected later.
+
+    Parameters:
+        root: A Tk widget whose event loop the change events are posted into.
+        callback (function): The function to call when the network has changed.
+    """
+    global _watching
+    _watching = (root, callback)
+    get_transport().watch(root, callback)
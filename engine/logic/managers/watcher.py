@@ -0,0 +1,376 @@
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+from . import filemanager
+
+# File systems on which changes by other computers are not reported by the local kernel
+REMOTE_FILESYSTEMS = ("nfs", "nfs4", "cifs", "smb3", "smbfs", "afs", "9p", "fuse.sshfs", "davfs", "fuse.davfs2")
+
+
+def is_local_fs(path):
+    """
+    Checks whether the given path lies on a local file system (using the Linux mount table).
+
+    Parameters:
+        path (str): The path to check.
+
+    Returns:
+        bool: True if the path is on a local file system, False if it is remote or unknown.
+    """
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) > 2]
+    except OSError:
+        return False
+    path = os.path.realpath(path)
+    fstype = ""
+    best = -1
+    for mountpoint, mounttype in mounts:
+        mountpoint = mountpoint.replace("\\040", " ")
+        if path == mountpoint or path.startswith(mountpoint.rstrip("/") + "/"):
+            if len(mountpoint) > best:  # Use the most specific mount point
+                best = len(mountpoint)
+                fstype = mounttype
+    return bool(fstype) and fstype not in REMOTE_FILESYSTEMS
+
+
+class WatcherBackend:
+    """
+    Base class of a watcher backend, which notifies about changes of a single file in the Tk event loop.
+    """
+    def __init__(self, root, path, callback):
+        """
+        Initialize the backend.
+
+        Parameters:
+            root: A Tk widget whose event loop the change events are posted into.
+            path (str): The path of the file to watch.
+            callback (function): The function to call when the file has changed.
+        """
+        self.root = root
+        self.path = path
+        self.callback = callback
+
+    @classmethod
+    def available(cls, root, path):
+        """
+        Checks whether the backend can watch the given file.
+
+        Parameters:
+            root: The Tk widget to post events into.
+            path (str): The path of the file to watch.
+
+        Returns:
+            bool: True if the backend can be used, False otherwise.
+        """
+        return True
+
+    def start(self):
+        """
+        Starts watching the file.
+        """
+
+    def stop(self):
+        """
+        Stops watching the file.
+        """
+
+    def notify_activity(self):
+        """
+        Informs the backend that a change is to be expected soon (e.g. after sending a message).
+        """
+
+
+class InotifyBackend(WatcherBackend):
+    """
+    Watches a file on a local file system with the Linux kernel's inotify interface.
+    The inotify file descriptor is registered in the Tk event loop, so no polling is needed at all.
+    The watch follows the inode: when another file takes the path (e.g. when a segment is sealed and the old
+    file stays linked as an archive, so no DELETE_SELF is reported), the new file is watched instead.
+    """
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+    REPLACED_MASK = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+    _libc = None
+
+    @classmethod
+    def _load_libc(cls):
+        """
+        Loads the C library providing the inotify functions.
+
+        Returns:
+            ctypes.CDLL|None: The C library, or None if inotify is not available.
+        """
+        if cls._libc is None and sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                libc.inotify_init1  # Raises AttributeError if inotify is missing
+                libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+                libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+                cls._libc = libc
+            except (OSError, AttributeError):
+                cls._libc = False
+        return cls._libc or None
+
+    @classmethod
+    def available(cls, root, path):
+        """
+        Checks whether inotify can be used for the given file: only on Linux, with a Tk supporting
+        file handlers, and only on local file systems (changes by other computers on a network share are not reported).
+
+        Parameters:
+            root: The Tk widget to post events into.
+            path (str): The path of the file to watch.
+
+        Returns:
+            bool: True if the backend can be used, False otherwise.
+        """
+        return bool(cls._load_libc()) and hasattr(root.tk, "createfilehandler") and is_local_fs(path)
+
+    def start(self):
+        """
+        Creates the inotify instance, adds the watch and registers it in the Tk event loop.
+
+        Raises:
+            OSError: If the inotify instance or the watch cannot be created.
+        """
+        libc = self._load_libc()
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._wd = -1
+        try:
+            self._add_watch()
+        except OSError:
+            os.close(self._fd)
+            raise
+        import tkinter as tk
+        self.root.tk.createfilehandler(self._fd, tk.READABLE, self._on_readable)
+
+    def _add_watch(self):
+        """
+        Adds the inotify watch for the file (replacing the watch of a previous file under the path).
+
+        Raises:
+            OSError: If the watch cannot be added.
+        """
+        libc = self._load_libc()
+        previous = self._wd
+        self._wd = libc.inotify_add_watch(self._fd, os.fsencode(self.path), self.WATCH_MASK)
+        if self._wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch", self.path)
+        self._ino = os.stat(self.path).st_ino
+        if previous >= 0 and previous != self._wd:
+            libc.inotify_rm_watch(self._fd, previous)  # The old file may live on as an archived segment
+
+    def _replaced(self):
+        """
+        Checks whether another file than the watched one is at the path now.
+
+        Returns:
+            bool: True if the file at the path has another inode or is missing.
+        """
+        try:
+            return os.stat(self.path).st_ino != self._ino
+        except OSError:
+            return True
+
+    def _on_readable(self, fd, mask):
+        """
+        Reads all pending inotify events and notifies about the change once.
+
+        Parameters:
+            fd (int): The inotify file descriptor.
+            mask (int): The Tk file event mask.
+        """
+        events = 0
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            while pos + 16 <= len(data):
+                _wd, ev_mask, _cookie, length = struct.unpack_from("iIII", data, pos)
+                events |= ev_mask
+                pos += 16 + length
+        if events & self.REPLACED_MASK or (events and self._replaced()):
+            # The file was deleted or replaced: watch the new file under the same path
+            try:
+                self._add_watch()
+            except OSError:
+                try:
+                    filemanager().update(network=self.path)  # Recreate the file
+                    self._add_watch()
+                except (OSError, Warning):
+                    pass
+        if events:
+            self.callback()
+
+    def stop(self):
+        """
+        Unregisters the inotify instance from the Tk event loop and closes it.
+        """
+        try:
+            self.root.tk.deletefilehandler(self._fd)
+            os.close(self._fd)  # Closing the instance also removes its watches
+        except (AttributeError, OSError):
+            pass
+
+
+class PollingBackend(WatcherBackend):
+    """
+    Polls the file for changes in the Tk event loop with an adaptive interval: after a change the file is
+    checked often, while the interval grows step by step as long as nothing happens.
+    """
+    min_interval = 100  # Polling interval right after a change (in ms)
+    max_interval = 1000  # Longest polling interval of an idle client (in ms), the fixed interval of former versions
+    backoff = 1.5  # Factor by which the interval grows for each check without a change
+
+    def start(self):
+        """
+        Starts polling with the shortest interval.
+        """
+        self._job = None
+        self.interval = self.min_interval
+        self._schedule()
+
+    def _schedule(self):
+        """
+        Schedules the next check.
+        """
+        self._job = self.root.after(int(self.interval), self._check)
+
+    def _check(self):
+        """
+        Checks the file for changes and adapts the polling interval.
+        """
+        if filemanager().changes_in_network():
+            self.interval = self.min_interval
+            self.callback()
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        self._schedule()
+
+    def notify_activity(self):
+        """
+        Resets the polling interval to its minimum and checks soon.
+        """
+        self.interval = self.min_interval
+        if self._job:
+            self.root.after_cancel(self._job)
+        self._schedule()
+
+    def stop(self):
+        """
+        Stops polling.
+        """
+        if self._job:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+
+class NetworkWatcher:
+    """
+    Watches the network file and posts change events into the Tk event loop.
+
+    The first available backend (in the order of `backends`) is used for each file,
+    so further backends can be plugged in by inserting them into the list.
+    """
+    def __init__(self):
+        """
+        Initialize the NetworkWatcher with the default backends.
+        """
+        self.backends = [InotifyBackend, PollingBackend]
+        self._root = None
+        self._callback = None
+        self._path = ""
+        self._backend = None
+
+    def start(self, root, callback):
+        """
+        Starts watching the current network file.
+
+        Parameters:
+            root: A Tk widget whose event loop the change events are posted into.
+            callback (function): The function to call when the network file has changed.
+        """
+        self._root = root
+        self._callback = callback
+        self._path = ""
+        self.follow(filemanager().network)
+
+    def follow(self, path):
+        """
+        Watches the given network file instead of the current one (does nothing if the path did not change).
+
+        Parameters:
+            path (str): The path of the network file to watch.
+        """
+        if path == self._path or self._root is None:
+            return
+        self.stop()
+        self._path = path
+        for backend in self.backends:
+            if not backend.available(self._root, path):
+                continue
+            watcher = backend(self._root, path, self._callback)
+            try:
+                watcher.start()
+            except OSError:
+                continue  # e.g. too many inotify watches: try the next backend
+            self._backend = watcher
+            return
+
+    def notify_activity(self):
+        """
+        Informs the watcher that the network file is about to change (e.g. after sending a message).
+        """
+        if self._backend:
+            self._backend.notify_activity()
+
+    @property
+    def backend(self):
+        """
+        Returns the name of the backend that is currently in use.
+
+        Returns:
+            str: The class name of the active backend, or an empty string if nothing is watched.
+        """
+        return type(self._backend).__name__ if self._backend else ""
+
+    def stop(self):
+        """
+        Stops watching the network file.
+        """
+        if self._backend:
+            self._backend.stop()
+            self._backend = None
+        self._path = ""
+
+
+_watcher = None
+def get_watcher():
+    """
+    Returns the global instance of NetworkWatcher.
+    If the instance does not exist, it creates a new one.
+
+    Returns:
+        NetworkWatcher: The global instance of NetworkWatcher.
+    """
+    global _watcher
+    if _watcher is None:
+        _watcher = NetworkWatcher()
+    return _watcher
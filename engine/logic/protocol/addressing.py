@@ -95,6 +95,25 @@ class ProtoFilter:
             return False
         return True
 
+    def check_span(self, view, span):
+        """Check if a line of a network view matches the filter criteria, without copying the line.
+
+        Parameters:
+            view (NetworkView): The view containing the line.
+            span (tuple(int, int)): The (offset, length) span of the line.
+        Returns:
+            bool: True if the line matches the filter criteria, False otherwise.
+        """
+        if self.is_empty():
+            return True
+        if not span[1]:
+            return False
+        if self._starts and not view.startswith(span, self._starts):
+            return False
+        if self._ends and not view.endswith(span, self._ends):
+            return False
+        return True
+
 
 
 class ProtoSignature:
@@ -1,3 +1,8 @@
+from collections import Counter
+from .codec import ByteCodec, CodecSnapshot, CodewordTrie, LineCache, StreamDecoder, CHARSETS
+from .parallel import DecodePool
+
+
 class BinaryCoder:
     """Class to handle binary encoding and decoding of text using a code dictionary and end-of-line marker."""
 
@@ -12,6 +17,79 @@ class BinaryCoder:
         self.__code_dict = code_dict
         self.__eol = eol
         self.__code_length = 0 # This will be set when the code dictionary is updated
+        self.__charset = "" # Standard encoding used instead of the dictionary (e.g. "utf-8")
+        self.__plain_format = (0, eol) # Code length and eol of the dictionary, restored when the charset is cleared
+        self.__version = 0 # Increased on every change of the dictionary, the code length, the eol or the compression
+        self.__codec = None # Compiled structures of the current version, see codec
+        self.__paths = {"encode": "", "decode": ""} # The ways the last text was encoded and decoded
+        self.__checked = {"codes": frozenset(), "words": frozenset()} # Last sets found uniquely decodable
+        self.__pool = None # Process pool for decoding many lines, started on first use
+        self.__line_cache = LineCache() # Decoded lines of the current version
+        self.__compression = False # Lines of the network are compressed where that saves bits
+        self.__ratio = 1.0 # Compression ratio of the last message
+
+    @property
+    def paths(self):
+        """
+        Get the ways the last text was encoded ("charset", "translate" or "trie") and decoded ("charset", "numpy",
+        "translate", "blocks", "automaton" or "segmentation"), e.g. to check the fast paths in benchmarks.
+
+        Returns:
+            dict: The paths by "encode" and "decode".
+        """
+        return dict(self.__paths)
+
+    @property
+    def timings(self):
+        """
+        Get the timings of the chunks of the last call of decode_many.
+
+        Returns:
+            list(tuple): The (lines, bits, seconds, "pool" or "local") of each chunk.
+        """
+        return list(self.__pool.timings) if self.__pool else []
+
+    @property
+    def line_cache(self):
+        """
+        Get the cache of decoded lines (with its hits and misses counters).
+
+        Returns:
+            LineCache: The cache.
+        """
+        return self.__line_cache
+
+    def _set_dict(self, code_dict):
+        """
+        Replace the code dictionary and start a new version.
+
+        Parameters:
+            code_dict (dict): The new code dictionary.
+        """
+        self.__code_dict = code_dict
+        self.__version += 1
+
+    @property
+    def version(self):
+        """
+        Get the version of the dictionary, which changes whenever the dictionary, the code length, the eol or the compression changes.
+
+        Returns:
+            int: The version.
+        """
+        return self.__version
+
+    @property
+    def codec(self):
+        """
+        Get the compiled structures of the current dictionary version (built once per version).
+
+        Returns:
+            CodecSnapshot: The snapshot of the current version.
+        """
+        if self.__codec is None or self.__codec.version != self.__version:
+            self.__codec = CodecSnapshot(self.__version, self.__code_dict, self.__code_length, self.__charset, self.__eol)
+        return self.__codec
 
     def update_dict(self, code_dict):
         """
@@ -20,7 +98,7 @@ class BinaryCoder:
         Parameters:
             code_dict (dict): The code dictionary to use.
         """
-        self.__code_dict = code_dict
+        self._set_dict(code_dict)
         self.match_code_length_dict()
         return self.__code_dict
 
@@ -31,8 +109,15 @@ class BinaryCoder:
         Parameters:
             eol (str): The end-of-line marker to use.
         """
+        previous = self.__eol
         self.__eol = eol
         self.match_code_length_eol()
+        if self.__charset and not self.separates(self.__charset, self.__eol):
+            self.__eol = previous
+            raise Warning("Zeilenende", self.__charset_eol_message(eol))
+        if self.__eol != previous:
+            self.__version += 1 # The header of compressed lines depends on the eol
+        self.__line_cache.clear() # The lines are split differently now
         return self.__eol
     
     def update_code_length(self, code_length):
@@ -42,17 +127,106 @@ class BinaryCoder:
         Parameters:
             code_length (int): The code length to use.
         """
+        if self.__charset:
+            # The standard encodings always use whole bytes, the dictionary is not used
+            if code_length != 8:
+                raise Warning("Wörterbuch", f"Der Zeichensatz {self.__charset} hat die feste Code-Länge 8!")
+            return self.__code_length
         if not code_length:
             self.__code_length = 0
+            self.__version += 1
             return self.__code_length
         # Validate the code length
         if not isinstance(code_length, int) or code_length < 0:
             raise Warning("Wörterbuch", "Ungültige Code-Länge!")
         self.__code_length = code_length
+        self.__version += 1
         self.match_code_length_eol()
         self.match_code_length_dict()
         return self.__code_length
         
+    def update_charset(self, charset):
+        """
+        Switch to a standard character encoding (8 bits per byte) instead of the dictionary, or back.
+
+        Parameters:
+            charset (str): The encoding ("ascii", "latin-1" or "utf-8"), or an empty string for the dictionary.
+
+        Raises:
+            Warning: If the encoding is unknown.
+        """
+        charset = (charset or "").lower()
+        if charset and charset not in CHARSETS:
+            raise Warning("Wörterbuch", f"Unbekannter Zeichensatz \"{charset}\"!")
+        if charset == self.__charset:
+            return self.__charset
+        if charset:
+            previous = (self.__code_length, self.__eol)
+            # The dictionary is not used, so only the eol has to match the code length of whole bytes
+            self.__code_length = 8
+            try:
+                self.match_code_length_eol()
+                if not self.separates(charset, self.__eol):
+                    raise Warning("Zeilenende", self.__charset_eol_message(self.__eol, charset))
+            except Warning:
+                self.__code_length, self.__eol = previous
+                raise
+            if not self.__charset:
+                self.__plain_format = previous
+        else:
+            # Back to the dictionary with its own code length and eol
+            self.__code_length, self.__eol = self.__plain_format
+            self.match_code_length_eol()
+        self.__charset = charset
+        self.__version += 1
+        self.__line_cache.clear() # The eol may have changed
+        return self.__charset
+
+    def separates(self, charset, eol):
+        """
+        Check that the end-of-line marker only occurs between the lines of a text in the standard encoding.
+
+        Parameters:
+            charset (str): The encoding.
+            eol (str): The end-of-line marker (one byte, or empty).
+
+        Returns:
+            bool: True if the marker cannot occur inside a line.
+        """
+        return not eol or not self.all_binary(eol) or ByteCodec(charset).separates(eol)
+
+    def __charset_eol_message(self, eol, charset=None):
+        """
+        Describe why an end-of-line marker cannot be used with the standard encoding.
+
+        Parameters:
+            eol (str): The end-of-line marker.
+            charset (str): The encoding (the current one if not given).
+
+        Returns:
+            str: The message.
+        """
+        return f"{eol} ist ein Zeichen von {charset or self.__charset} und würde Nachrichten teilen, bitte 00001010 (Zeilenumbruch) verwenden!"
+
+    def update_compression(self, compression):
+        """
+        Switch the compression of the lines of the network on or off.
+        Compressed lines are only expanded while compression is on, so switching starts a new version.
+
+        Parameters:
+            compression (bool): Whether the lines are compressed.
+
+        Raises:
+            Warning: If compression is switched on but there is no header for compressed lines.
+        """
+        compression = bool(compression)
+        if compression and not self.codec.framing.can_compress:
+            raise Warning("Komprimierung", "Keine freie Kennung für komprimierte Zeilen: Das Wörterbuch braucht einen ungenutzten Code (und muss präfixfrei sein), der Zeichensatz ein ungenutztes Byte!")
+        if compression != self.__compression:
+            self.__compression = compression
+            self.__version += 1
+        return self.__compression
+
     def match_code_length_eol(self):
         """Adjust the eol to match the specified code length.
 
@@ -73,33 +247,37 @@ class BinaryCoder:
 
     def match_code_length_dict(self):
         """
-        Adjust the code dictionary to match the specified code length.
+        Adjust the code dictionary to match the specified code length (while a standard encoding is used,
+        the code length of the dictionary itself, which is restored when the encoding is cleared).
         """
-        if not self.__code_length:
+        code_length = self.dict_code_length
+        if not code_length:
             return True # No code length set, nothing to match
         # Update the code dictionary to ensure all codes are of the specified length
         code_dict = {}
         for word in self.__code_dict:
-            match = self.match_code_length(self.__code_dict[word])
+            match = self.match_code_length(self.__code_dict[word], code_length)
             if not match:
-                raise Warning("Wörterbuch", f"Code für \"{word}\" kann nicht auf die Länge {self.__code_length} gekürzt werden!")
+                raise Warning("Wörterbuch", f"Code für \"{word}\" kann nicht auf die Länge {code_length} gekürzt werden!")
             else:
                 code_dict[word] = match
         self.is_unidec(code_dict) # Ensure the dictionary is still uniquely decodable after matching lengths
-        self.__code_dict = code_dict
+        self._set_dict(code_dict)
         return True
 
-    def match_code_length(self, code):
+    def match_code_length(self, code, code_length=None):
         """
         Match the code to the specified code length.
 
         Parameters:
             code (str): The code to match.
+            code_length (int): The code length to match (the current one if not given).
 
         Returns:
             str|bool: The matched code or False if it cannot be matched.
         """
-        code_length = self.__code_length
+        if code_length is None:
+            code_length = self.__code_length
         if not code_length:
             return code # No code length set, nothing to match
         if len(code) < code_length:
@@ -132,6 +310,35 @@ class BinaryCoder:
         """
         return self.__eol
     @property
+    def charset(self):
+        """
+        Get the standard character encoding used instead of the dictionary.
+
+        Returns:
+            str: The encoding, or an empty string if the dictionary is used.
+        """
+        return self.__charset
+    @property
+    def compression(self):
+        """
+        Get whether the lines of the network are framed and compressed.
+
+        Returns:
+            bool: True if compression is on.
+        """
+        return self.__compression
+
+    @property
+    def compression_ratio(self):
+        """
+        Get the size of the last message relative to its size without compression.
+
+        Returns:
+            float: The ratio (1.0 without compression).
+        """
+        return self.__ratio
+
+    @property
     def code_length(self):
         """
         Get the code length.
@@ -141,6 +348,16 @@ class BinaryCoder:
         """
         return self.__code_length
 
+    @property
+    def dict_code_length(self):
+        """
+        Get the code length of the dictionary, which differs from code_length while a standard encoding is used.
+
+        Returns:
+            int: The code length of the dictionary, or 0 for variable-length codes.
+        """
+        return self.__plain_format[0] if self.__charset else self.__code_length
+
     def parse(self, code_text):
         """
         Parse the code text and update the code dictionary.
@@ -153,7 +370,7 @@ class BinaryCoder:
         """
         # Read entries from the text field and update the dictionary
         if not code_text:
-            self.__code_dict = {}
+            self._set_dict({})
             return self.__code_dict
         code_dict = {}
         code_list = code_text.strip().strip(",").split(",")
@@ -176,6 +393,10 @@ class BinaryCoder:
                 raise Warning("Wörterbuch", f"\"{cleanword}\" mehrfach kodiert!")
             code_dict[cleanword] = binary.strip()
         
+        # Compare with the current dictionary (codes as stored after matching the code length)
+        matched = {word: self.match_code_length(code, self.dict_code_length) or code for word, code in code_dict.items()}
+        if list(matched.items()) == list(self.__code_dict.items()):
+            return self.__code_dict # Nothing changed, the version stays the same
         self.is_unidec(code_dict)
         self.update_dict(code_dict)
         return self.__code_dict
@@ -191,54 +412,55 @@ class BinaryCoder:
             return ""
         return ", ".join(f'"{k}"={v}' for k, v in self.__code_dict.items()) + ","
 
-    def find_common_multiple(self, codewords):
+    def find_common_multiple(self, codewords, trie=None):
         """
         Find a common multiple in the list of codewords using the Sardinas–Patterson algorithm.
 
         Parameters:
             codewords (list): The list of codewords to check.
+            trie (CodewordTrie): The trie of the codewords, if already built.
 
         Returns:
             str: The common multiple if found, otherwise an empty string.
         """
+        trie = trie or CodewordTrie(codewords)
+        if trie.prefix_free:
+            return "" # Prefix-free codes are always uniquely decodable
         # Sardinas–Patterson algorithm
+        words = trie.codewords
         track = {}
 
-        suffixes = set(codewords)
-        s_sets = [suffixes]
+        suffixes = frozenset(words)
+        seen = {suffixes}
 
         while suffixes:
             new_suffixes = set()
             for suffix in suffixes:
-                for codeword in codewords:
-                    if suffix.startswith(codeword):
-                        new_suffix = suffix[len(codeword):]
-                        if new_suffix == "":
-                            continue
-                        track[new_suffix] = track.get(codeword,codeword)+new_suffix
-                        if new_suffix in codewords:
-                            return track[new_suffix]
-                        new_suffixes.add(new_suffix)
-                    if codeword.startswith(suffix):
-                        new_suffix = codeword[len(suffix):]
-                        if new_suffix == "":
-                            continue
-                        track[new_suffix] = track.get(suffix,suffix)+new_suffix
-                        if new_suffix in codewords:
-                            return track[new_suffix]
-                        new_suffixes.add(new_suffix)
-            suffixes = new_suffixes
-            for s in s_sets:
-                if s == suffixes:
-                    return ""
-            else:
-                s_sets.append(suffixes)
+                # Codewords that begin the suffix
+                for new_suffix in trie.tails(suffix):
+                    codeword = suffix[:len(suffix)-len(new_suffix)]
+                    track[new_suffix] = track.get(codeword,codeword)+new_suffix
+                    if new_suffix in words:
+                        return track[new_suffix]
+                    new_suffixes.add(new_suffix)
+                # Codewords that continue the suffix
+                for new_suffix in trie.extensions(suffix):
+                    track[new_suffix] = track.get(suffix,suffix)+new_suffix
+                    if new_suffix in words:
+                        return track[new_suffix]
+                    new_suffixes.add(new_suffix)
+            suffixes = frozenset(new_suffixes)
+            if suffixes in seen:
+                return "" # The sets repeat from here on
+            seen.add(suffixes)
         return ""
 
     def is_unidec(self, code_dict):
         """Check if the binary codes in the dictionary are uniquely decodable.
         
         Raises a Warning if there are duplicates or common multiples.
+        Codes and words that are a subset of the last accepted ones are not checked again,
+        since leaving out codewords keeps a code uniquely decodable.
         
         Parameters:
             code_dict (dict): The dictionary containing words and their binary codes.
@@ -249,18 +471,29 @@ class BinaryCoder:
         # Check for uniqueness of the binary codes
         binary_codes = list(code_dict.values())
         # Find double entries in the binary codes
+        counts = Counter(binary_codes)
         for code in binary_codes:
-            if binary_codes.count(code) > 1:
+            if counts[code] > 1:
                 raise Warning("Wörterbuch", f"Nicht eindeutige Kodierung - \"{code}\" mehrfach vergeben")
-        # Check for common multiple in binary codes
-        checkbinary = self.find_common_multiple(binary_codes)
-        if checkbinary:
-            raise Warning("Wörterbuch", f"Nicht eindeutig: \"{checkbinary}\"")
+        codes = frozenset(counts)
+        if not codes <= self.__checked["codes"]:
+            # Too many short codes can never be uniquely decodable (Kraft–McMillan inequality)
+            trie = CodewordTrie(codes)
+            if trie.kraft_sum > 1:
+                raise Warning("Wörterbuch", f"Nicht eindeutig: zu viele kurze Codes (Kraft-Summe {trie.kraft_sum} > 1)")
+            # Check for common multiple in binary codes
+            checkbinary = self.find_common_multiple(binary_codes, trie)
+            if checkbinary:
+                raise Warning("Wörterbuch", f"Nicht eindeutig: \"{checkbinary}\"")
+            self.__checked["codes"] = codes
         
         # Check for uniqueness of the codewords
-        checkwords = self.find_common_multiple(list(self.__code_dict.keys()))
-        if checkwords:
-            raise Warning("Wörterbuch", f"Nicht eindeutige Kodierung, von z.B. \"{checkwords}\"")
+        words = frozenset(code_dict)
+        if not words <= self.__checked["words"]:
+            checkwords = self.find_common_multiple(list(words))
+            if checkwords:
+                raise Warning("Wörterbuch", f"Nicht eindeutige Kodierung, von z.B. \"{checkwords}\"")
+            self.__checked["words"] = words
 
     def is_in_dict(self, code):
         """Check if the given code is in the dictionary.
@@ -273,7 +506,7 @@ class BinaryCoder:
         """
         
         if code:
-            if code in list(self.__code_dict.values()):
+            if code in self.codec.codes:
                 return True
         return False
     
@@ -293,23 +526,110 @@ class BinaryCoder:
         """
         if not text:
             return text
+        codec = self.codec
+        if codec.byte_codec:
+            self.__paths["encode"] = "charset"
+            return codec.byte_codec.encode(text, self.__eol)
         if not self.__code_dict:
             raise Warning("Kodierprozess", "Wörterbuch ist leer!")
-        i = 0
-        binary_code = ""
-        maxwordlength = max(len(word) for word in self.__code_dict.keys())
-        while i < len(text):
-            if text[i] == "\n":
-                binary_code = self.append_eol(binary_code)
-                i += 1
-            for length in range(maxwordlength, 0, -1): # Check for the longest word first
-                if text[i:i+length] in self.__code_dict:
-                    binary_code += self.__code_dict[text[i:i+length]]
-                    i += length
-                    break
-            else:
-                raise Warning("Kodierprozess", f"\"{text[i:]}\" nicht kodierbar")
-        return binary_code
+        if codec.translator:
+            binary_code = codec.translator.encode(text, self.__eol)
+            if binary_code is not None:
+                self.__paths["encode"] = "translate"
+                return binary_code
+        self.__paths["encode"] = "trie"
+        return codec.encoder.encode(text, self.__eol)
+
+    def encode_message(self, text, encode=True):
+        """
+        Encode a message for the network. With compression, a line is compressed (LZ77 over the codes of its words)
+        and marked by the header of compressed lines if that saves bits and does not form an end-of-line marker;
+        all other lines are sent unchanged.
+
+        Parameters:
+            text (str): The message (a text, or bits if encode is False).
+            encode (bool): Whether the message is encoded with the dictionary.
+
+        Returns:
+            str: The binary code of the lines, joined by the end-of-line marker.
+
+        Raises:
+            Warning: If the text cannot be encoded.
+        """
+        if not self.__compression:
+            self.__ratio = 1.0
+            return self.encode_text(text) if encode else text
+        codec = self.codec
+        framing = codec.framing
+        lines = text.split("\n") if encode else [text]
+        framed = []
+        plain_bits = 0
+        for line in lines:
+            codes = None
+            if encode and line:
+                if codec.byte_codec:
+                    bits = codec.byte_codec.encode(line, "")
+                    codes = [bits[i:i+8] for i in range(0, len(bits), 8)]
+                elif not self.__code_dict:
+                    raise Warning("Kodierprozess", "Wörterbuch ist leer!")
+                else:
+                    codes = codec.encoder.codes(line, "")
+            plain = "".join(codes) if codes else ("" if encode else line)
+            plain_bits += len(plain)
+            message = plain
+            if codes and framing.can_compress:
+                packed = framing.header + framing.compress(codes)
+                if len(packed) < len(message) and self.__ends_at_eol(packed):
+                    message = packed
+            framed.append(message)
+        binary_text = self.__eol.join(framed)
+        original = plain_bits + len(self.__eol) * (len(lines) - 1)
+        self.__ratio = len(binary_text) / original if original else 1.0
+        return binary_text
+
+    def __ends_at_eol(self, line):
+        """
+        Check that a line followed by the end-of-line marker is split exactly after the line.
+
+        Parameters:
+            line (str): The binary code of the line.
+
+        Returns:
+            bool: Whether the first end-of-line marker found is the one after the line.
+        """
+        if not self.__eol:
+            return True
+        return next(self.eol_spans(line + self.__eol))[1] == len(line)
+
+    def decode_message(self, binary_text, warn=False):
+        """Decode a line of the network. With compression, a line that is not a valid uncompressed line
+        but starts with the header is expanded first; all other lines are decoded exactly as decode_text does.
+
+        Parameters:
+            binary_text (str): The line to decode.
+            warn (bool): If True, raises a Warning if the line cannot be decoded.
+
+        Returns:
+            str: The decoded text, or what decode_text returns for the line if decoding fails.
+
+        Raises:
+            Warning: If the line cannot be decoded and warn is True.
+        """
+        if not (self.__compression and binary_text):
+            return self.decode_text(binary_text, warn)
+        try:
+            return self.decode_text(binary_text, warn=True)
+        except Warning as failure:
+            framing = self.codec.framing
+            plain = framing.unframe(binary_text) if framing.is_packed(binary_text) else None
+            if plain:  # A compressed line always holds at least one code
+                try:
+                    return self.decode_text(plain, warn=True)
+                except Warning:
+                    pass
+            if warn:
+                raise failure
+        return self.decode_text(binary_text)
 
     # OLD
     # def decode_text(self, binary_code, warn=False):
@@ -332,57 +652,122 @@ class BinaryCoder:
     #                 i += 1
     #     return text
 
-    def decode_text(self, binary_text):
+    def decode_text(self, binary_text, warn=False):
         """Decode a binary code into text.
         
         Parameters:
             binary_text (str): The binary code to decode.
+            warn (bool): If True, raises a Warning if the code cannot be decoded.
 
         Returns:
             str: The decoded text or the original binary code if decoding fails.
+
+        Raises:
+            Warning: If the binary code cannot be decoded and warn is True.
         """
+        if self.__charset and binary_text:
+            self.__paths["decode"] = "charset"
+            text = self.codec.byte_codec.decode(binary_text)
+            if text is None:
+                if warn:
+                    raise Warning("Dekodierprozess", f"\"{binary_text}\" ist kein Text in {self.__charset}")
+                return binary_text
+            return text
         if not (binary_text and self.__code_dict):
+            if warn and binary_text:
+                raise Warning("Dekodierprozess", "Wörterbuch ist leer!")
             return binary_text
         if not self.__code_length:
-            return self.dec_wo_length(binary_text)
+            return self.dec_wo_length(binary_text, warn)
         else:
-            return self.dec_with_length(binary_text)
+            return self.dec_with_length(binary_text, warn)
     
-    def dec_with_length(self, binary_text):
+    def decode_many(self, binary_texts):
+        """Decode many binary codes (e.g. all lines of the network), on a process pool if they are long enough.
+        Lines in the cache of decoded lines are not decoded again. The timings of the chunks are available in timings afterwards.
+
+        Parameters:
+            binary_texts (list): The binary codes to decode.
+
+        Returns:
+            list: The decoded texts in the order of the binary codes, each as decode_message returns it.
+        """
+        if self.__pool is None:
+            self.__pool = DecodePool()
+        binary_texts = list(binary_texts)
+        cache = self.__line_cache
+        key = (self.__version, self.__code_length)
+        texts = [cache.get(key, line) for line in binary_texts]
+        # Only the lines not cached yet are decoded, each only once
+        missing = list(dict.fromkeys(line for line, text in zip(binary_texts, texts) if text is None))
+        decoded = dict(zip(missing, self.__pool.decode(self, missing)))
+        for line, text in decoded.items():
+            cache.put(key, line, text)
+        return [decoded[line] if text is None else text for line, text in zip(binary_texts, texts)]
+
+    def decode_line(self, binary_text):
+        """Decode a line of the network, using the cache of decoded lines.
+
+        Parameters:
+            binary_text (str): The binary code to decode.
+
+        Returns:
+            str: The decoded text or the original binary code if decoding fails (as decode_message).
+        """
+        key = (self.__version, self.__code_length)
+        text = self.__line_cache.get(key, binary_text)
+        if text is None:
+            text = self.decode_message(binary_text)
+            self.__line_cache.put(key, binary_text, text)
+        return text
+
+    def stream_decoder(self):
+        """Create a decoder for a text that arrives piece by piece, e.g. the unfinished last line of the network.
+        It decodes only the fed bits and gives the same text as decode_message for all fed bits.
+
+        Returns:
+            StreamDecoder: The decoder (it keeps the current dictionary, see its version).
+
+        Raises:
+            Warning: If a binary code does not have the fixed code length.
+        """
+        return StreamDecoder(self.codec, self.decode_message if self.__compression else None)
+
+    def dec_with_length(self, binary_text, warn=False):
         """Decode a binary code considering the code length.
 
         Parameters:
             binary_text (str): The binary code to decode.
+            warn (bool): If True, raises a Warning if the code cannot be decoded completely.
 
         Returns:
-            str: The decoded text or the original binary code if decoding fails.
+            str: The decoded text (unknown blocks kept as binary code) or the original binary code if decoding fails.
 
         Raises:
-            Warning: If the decoding process fails.
+            Warning: If the decoding process fails, or the code cannot be decoded completely and warn is True.
         """
 
         if not isinstance(self.__code_length, int) or self.__code_length < 0:
             raise Warning("Dekodierprozess", "Ungültige Code-Länge!")
-        # reverse the code dictionary for decoding
-        revdict = {v: k for k, v in self.__code_dict.items()}
+        codec = self.codec
         # Check if all binary codes in the dictionary have the correct length
-        for bcode in revdict.keys():
-            if len(bcode) != self.__code_length:
-                raise Warning("Dekodierprozess", f"Binärcode \"{bcode}\" von \"{revdict[bcode]}\" hat nicht die Länge {self.__code_length}!")
-        text = ""
-        for k in range(0, len(binary_text), self.__code_length):
-            if k + self.__code_length > len(binary_text):
-                return binary_text
-            code = binary_text[k:k + self.__code_length]
-            if code in revdict:
-                word = revdict[code]
-            else:
-                word = code
-            text += word
+        if codec.wrong_length:
+            bcode, word = codec.wrong_length
+            raise Warning("Dekodierprozess", f"Binärcode \"{bcode}\" von \"{word}\" hat nicht die Länge {self.__code_length}!")
+        code_length = self.__code_length
+        if len(binary_text) % code_length:
+            if warn:
+                raise Warning("Dekodierprozess", f"\"{binary_text}\" hat nicht die Code-Länge {code_length}")
+            return binary_text
+        if warn:
+            revdict = codec.fixed_decoder.revdict
+            for k in range(0, len(binary_text), code_length):
+                if binary_text[k:k + code_length] not in revdict:
+                    raise Warning("Dekodierprozess", f"\"{binary_text[k:k + code_length]}\" nicht dekodierbar")
+        text = codec.fixed_decoder.decode(binary_text)
+        self.__paths["decode"] = codec.fixed_decoder.last_path
         return text
 
-            
-
     def dec_wo_length(self, binary_code, warn=False):
         """Decode a binary code without considering the code length.
 
@@ -395,18 +780,30 @@ class BinaryCoder:
             Warning: If the binary code cannot be decoded and warn is True.
         """
 
-        # reverse the code dictionary for decoding
-        revdict = {v: k for k, v in self.__code_dict.items()}
+        decoder = self.codec.decoder
+        self.__paths["decode"] = "automaton" if decoder.prefix_free else "segmentation"
+        if decoder.prefix_free:
+            # Single pass through the decoding automaton
+            text = decoder.decode(binary_code)
+            if text is not None:
+                return text
+            if warn:
+                raise Warning("Dekodierprozess", f"\"{binary_code}\" nicht dekodierbar")
+            return binary_code
+        if not decoder.lengths:
+            return binary_code
+
+        # Codes that are not prefix-free may need a look-ahead: find the segmentation by dynamic programming
+        revdict = decoder.revdict
         n = len(binary_code)
         # dp[i] = (prev_index, word) if binary_code[:i] can be decoded, else (0, "")
         dp = [(0, "") for _ in range(n + 1)]
         dp[0] = (-1, "")  # Base case: empty string can be decoded
-        max_code_len = max(len(code) for code in revdict.keys())
 
         for i in range(1, n + 1):
-            for l in range(1, max_code_len + 1):
+            for l in decoder.lengths:
                 if i - l < 0:
-                    continue
+                    break
                 code = binary_code[i - l:i]
                 if code in revdict and dp[i - l] != (0, ""):
                     dp[i] = (i - l, revdict[code])
@@ -450,6 +847,55 @@ class BinaryCoder:
         """
         return self.__eol+text
 
+    def check_eol(self):
+        """
+        Check if the end-of-line marker can be used to split binary code.
+
+        Raises:
+            Warning: If the end-of-line marker is not binary or does not match the code length.
+        """
+        if not self.all_binary(self.__eol):
+            raise Warning("Zeilenende", "Nur 0 und 1 erlaubt!")
+        if self.__code_length and self.__eol and len(self.__eol) != self.__code_length:
+            raise Warning("Zeilenende", f"Zeilenende muss die Länge {self.__code_length} haben!")
+
+    def eol_spans(self, binary_code, start=0, end=None):
+        """
+        Find the lines of the binary code between the end-of-line markers without copying them.
+        The markers are searched with str.find; with a fixed code length only the block-aligned ones count
+        (the blocks start at the beginning of each line).
+
+        Parameters:
+            binary_code (str): The binary code to split.
+            start (int): The position to start at.
+            end (int): The position to stop at (the end of the binary code if not given).
+
+        Yields:
+            tuple(int, int): The (start, end) offsets of each line, the last one being the part after the last marker.
+
+        Raises:
+            Warning: If the end-of-line marker is not binary or does not match the code length.
+        """
+        if end is None:
+            end = len(binary_code)
+        eol = self.__eol
+        if not eol:
+            yield start, end
+            return
+        self.check_eol()
+        code_length = self.__code_length
+        find = binary_code.find
+        pos = find(eol, start, end)
+        while pos != -1:
+            misalignment = (pos - start) % code_length if code_length else 0
+            if misalignment:
+                pos = find(eol, pos + code_length - misalignment, end) # Skip to the next block boundary
+                continue
+            yield start, pos
+            start = pos + len(eol)
+            pos = find(eol, start, end)
+        yield start, end
+
     def split_eol(self, binary_code):
         """
         Split the binary code into parts using the end-of-line marker.
@@ -460,30 +906,7 @@ class BinaryCoder:
         Returns:
             list: A list of binary code parts.
         """
-        if not self.__eol:
-            return [binary_code]
-        if not self.all_binary(self.__eol):
-            raise Warning("Zeilenende", "Nur 0 und 1 erlaubt!")
-        if self.__code_length:
-            if len(self.__eol) != self.__code_length:
-                raise Warning("Zeilenende", f"Zeilenende muss die Länge {self.__code_length} haben!")
-            # Split the binary code by the eol, which is a fixed-length binary string
-            parts = []
-            current_part = ""
-            start = 0
-            while start + self.__code_length <= len(binary_code):
-                current_block = binary_code[start:start+self.__code_length]
-                if current_block == self.__eol:
-                    parts.append(current_part)
-                    current_part = ""
-                else:
-                    current_part += current_block
-                start = start + self.__code_length
-            current_part += binary_code[start:]
-            parts.append(current_part)
-            return parts
-        else:
-            return binary_code.split(self.__eol)
+        return [binary_code[start:end] for start, end in self.eol_spans(binary_code)]
 
     def decode_data(self, data):
         """
@@ -0,0 +1,1081 @@
+import codecs
+from collections import OrderedDict
+from fractions import Fraction
+from functools import cached_property
+from .compression import LZ77Framing
+try:
+    import numpy as np  # Optional: vectorised decoding of fixed-length codes
+except ImportError:
+    np = None
+
+
+class EncodeTrie:
+    """
+    Character trie of the words of a code dictionary for encoding texts by greedy longest match.
+
+    The trie is built once per dictionary; encoding walks it from each position on instead of
+    slicing and hashing every possible word length.
+    """
+    END = ""  # Key of the code in a node where a word ends (never a character of the text)
+
+    def __init__(self, code_dict):
+        """
+        Builds the trie.
+
+        Parameters:
+            code_dict (dict): The code dictionary (word -> binary code).
+        """
+        self.root = {}
+        for word, code in code_dict.items():
+            if not word:
+                continue  # An empty word can never be matched
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node[self.END] = code
+
+    def encode(self, text, eol):
+        """
+        Encodes a text, replacing each line break with the end-of-line marker.
+
+        Parameters:
+            text (str): The text to encode.
+            eol (str): The end-of-line marker.
+
+        Returns:
+            str: The encoded binary code.
+
+        Raises:
+            Warning: If a part of the text is not in the dictionary.
+        """
+        return "".join(self.codes(text, eol))
+
+    def codes(self, text, eol):
+        """
+        Encodes a text into the list of codes of its words (and end-of-line markers).
+
+        Parameters:
+            text (str): The text to encode.
+            eol (str): The end-of-line marker.
+
+        Returns:
+            list: The binary codes.
+
+        Raises:
+            Warning: If a part of the text is not in the dictionary.
+        """
+        root = self.root
+        end_key = self.END
+        parts = []
+        i = 0
+        n = len(text)
+        while i < n:
+            if text[i] == "\n":
+                parts.append(eol)
+                i += 1
+                continue
+            # Walk the trie as far as the text matches and remember the longest word on the way
+            node = root
+            j = i
+            match = None
+            while j < n:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                code = node.get(end_key)
+                if code is not None:
+                    match, end = code, j
+            if match is None:
+                raise Warning("Kodierprozess", f"\"{text[i:]}\" nicht kodierbar")
+            parts.append(match)
+            i = end
+        return parts
+
+
+class TranslateEncoder:
+    """
+    Encoder of dictionaries whose words are all single characters, using a translation table,
+    so the whole text is encoded by str.translate without any work per character in Python.
+    """
+    def __init__(self, code_dict):
+        """
+        Builds the translation table.
+
+        Parameters:
+            code_dict (dict): The code dictionary (character -> binary code).
+        """
+        self.table = {ord(char): code for char, code in code_dict.items()}
+        self.alphabet = frozenset(code_dict) | {"\n"}
+
+    @staticmethod
+    def suitable(code_dict):
+        """
+        Checks if all words of a dictionary are single characters.
+
+        Parameters:
+            code_dict (dict): The code dictionary.
+
+        Returns:
+            bool: True if the dictionary can be encoded by translation.
+        """
+        return bool(code_dict) and all(len(word) == 1 for word in code_dict)
+
+    def encode(self, text, eol):
+        """
+        Encodes a text, replacing each line break with the end-of-line marker.
+
+        Parameters:
+            text (str): The text to encode.
+            eol (str): The end-of-line marker.
+
+        Returns:
+            str|None: The encoded binary code, or None if the text contains characters that are not in the dictionary.
+        """
+        if not self.alphabet.issuperset(text):
+            return None
+        self.table[ord("\n")] = eol  # Line breaks always become the end-of-line marker
+        return text.translate(self.table)
+
+
+class PrefixDecoder:
+    """
+    Decoding automaton of a code dictionary, derived from the binary trie of its codes.
+
+    For prefix-free codes the text is decoded in a single left-to-right pass: the automaton consumes
+    `step` bits at once and remembers the transition of each (state, bits) pair, so after a short warm-up
+    every step is a single lookup instead of slicing and hashing each possible code length.
+    The state between two calls of feed() is the trie node reached by the bits of an unfinished code,
+    so long inputs can be decoded piece by piece.
+    """
+    step = 8  # Number of bits consumed per transition
+    BITS = {"0": 0, "1": 1}
+
+    def __init__(self, code_dict):
+        """
+        Builds the trie of the codes.
+
+        Parameters:
+            code_dict (dict): The code dictionary (word -> binary code).
+        """
+        self.revdict = {code: word for word, code in code_dict.items()}  # The last word wins, like in a reversed dict
+        self.lengths = sorted({len(code) for code in self.revdict if code})  # Occurring code lengths
+        self._children = [[-1, -1]]  # Child nodes (for bit 0 and 1) of each node, node 0 is the root
+        self._words = {}  # Words of the nodes where a code ends
+        for code, word in self.revdict.items():
+            if not code:
+                continue
+            node = 0
+            for bit in code:
+                child = self._children[node][bit == "1"]
+                if child == -1:
+                    child = len(self._children)
+                    self._children.append([-1, -1])
+                    self._children[node][bit == "1"] = child
+                node = child
+            self._words[node] = word
+        # Prefix-free if no code ends inside another code
+        self.prefix_free = bool(self._words) and all(self._children[node] == [-1, -1] for node in self._words)
+        self._transitions = [{} for _ in self._children]  # Cached transitions of each node
+
+    def _walk(self, state, bits):
+        """
+        Follows the trie bit by bit, restarting at the root after each complete code.
+
+        Parameters:
+            state (int): The node to start from.
+            bits (str): The bits to consume.
+
+        Returns:
+            tuple(tuple, int)|None: The decoded words and the reached node, or None if the bits cannot be decoded.
+        """
+        children = self._children
+        words = self._words
+        found = []
+        for bit in bits:
+            bit = self.BITS.get(bit)
+            if bit is None:
+                return None
+            state = children[state][bit]
+            if state == -1:
+                return None
+            if state in words:
+                found.append(words[state])
+                state = 0
+        return tuple(found), state
+
+    def feed(self, bits, state=0):
+        """
+        Decodes bits (of a prefix-free code) starting in the given state.
+
+        Parameters:
+            bits (str): The bits to decode.
+            state (int): The state after the previous bits (0 at the start of a text).
+
+        Returns:
+            tuple(list, int)|None: The decoded words and the state after the bits, or None if the bits cannot be decoded.
+        """
+        transitions = self._transitions
+        step = self.step
+        words = []
+        for pos in range(0, len(bits), step):
+            chunk = bits[pos:pos + step]
+            entry = transitions[state].get(chunk, False)
+            if entry is False:
+                entry = transitions[state][chunk] = self._walk(state, chunk)
+            if entry is None:
+                return None
+            found, state = entry
+            if found:
+                words.extend(found)
+        return words, state
+
+    def code_end(self, bits, pos):
+        """
+        Finds the end of the code that starts at a position (of a prefix-free code).
+
+        Parameters:
+            bits (str): The bits.
+            pos (int): The start of the code.
+
+        Returns:
+            int: The position after the code, or -1 if no code starts there.
+        """
+        children = self._children
+        words = self._words
+        state = 0
+        for end in range(pos, len(bits)):
+            bit = self.BITS.get(bits[end])
+            if bit is None:
+                return -1
+            state = children[state][bit]
+            if state == -1:
+                return -1
+            if state in words:
+                return end + 1
+        return -1
+
+    def unused_prefix(self, eol=""):
+        """
+        Finds the shortest bits (the smallest of them) that no text of the prefix-free code starts with,
+        i.e. that leave the trie after a sequence of complete codes.
+
+        Parameters:
+            eol (str): The end-of-line marker, which must not occur in the bits.
+
+        Returns:
+            str: The bits, or an empty string if every bit sequence starts a text (the code is complete or not prefix-free).
+        """
+        if not self.prefix_free:
+            return ""
+        children = self._children
+        words = self._words
+        queue = [(0, "")]
+        seen = {0}
+        for node, path in queue:  # Breadth-first, so shorter bits come first and 0 before 1
+            for bit in (0, 1):
+                bits = path + "01"[bit]
+                child = children[node][bit]
+                if child == -1:
+                    if not eol or eol not in bits:
+                        return bits
+                    continue
+                if child in words:
+                    child = 0
+                if child not in seen:
+                    seen.add(child)
+                    queue.append((child, bits))
+        return ""
+
+    def decode(self, bits):
+        """
+        Decodes a complete text of a prefix-free code.
+
+        Parameters:
+            bits (str): The bits to decode.
+
+        Returns:
+            str|None: The decoded text, or None if the bits are not a sequence of complete codes.
+        """
+        result = self.feed(bits)
+        if result is None or result[1] != 0:
+            return None
+        return "".join(result[0])
+
+
+
+class FixedLengthDecoder:
+    """
+    Decoder of codes with a fixed code length, which maps each block of bits to its word
+    (blocks that are not in the dictionary stay as they are).
+
+    With NumPy, long texts are decoded in one vectorised step: the bits are viewed as a matrix with one
+    block per row, each row is converted into its number, and the numbers are mapped to the words through
+    a lookup table. Without NumPy, each block is padded to the width of a character, the bits are packed
+    into one character per block and the characters are replaced by their words with str.translate.
+    Only short texts with more than 8 bits per block (and without NumPy blocks of 16 bits or more) are looked up one by one.
+    """
+    min_bits = 4096  # Shortest text decoded with NumPy (shorter texts do not pay off the setup)
+    max_table_length = 16  # Longest code length for which a lookup table of all blocks is built
+
+    def __init__(self, revdict, code_length):
+        """
+        Initialize the decoder.
+
+        Parameters:
+            revdict (dict): The words by their codes.
+            code_length (int): The fixed code length.
+        """
+        self.revdict = revdict
+        self.code_length = code_length
+        self.last_path = ""  # The way the last text was decoded ("numpy", "translate" or "blocks")
+        self._table = None  # Words (or blocks) of all possible block numbers, built on first use
+        self._translation = None  # Translation table of the block characters, built on first use
+        # Bits per character: Latin-1 bytes, or UTF-16 units below the surrogates (which could be joined into pairs)
+        self._width = 8 if code_length <= 8 else 16
+
+    @property
+    def vectorised(self):
+        """
+        Checks if the NumPy fast path is available for this code length.
+
+        Returns:
+            bool: True if long texts are decoded with NumPy.
+        """
+        return np is not None and self.code_length <= self.max_table_length
+
+    def decode(self, bits):
+        """
+        Decodes a text consisting of complete blocks.
+
+        Parameters:
+            bits (str): The bits to decode (the length is a multiple of the code length).
+
+        Returns:
+            str: The decoded text.
+        """
+        if self.code_length > self.max_table_length:
+            self.last_path = "blocks"
+            return self._decode_python(bits)
+        if np is not None and len(bits) >= self.min_bits:
+            text = self._decode_numpy(bits)
+            if text is not None:
+                self.last_path = "numpy"
+                return text
+        if self.code_length <= 8 or self.code_length < 16 and len(bits) >= self.min_bits:
+            text = self._decode_translate(bits)
+            if text is not None:
+                self.last_path = "translate"
+                return text
+        self.last_path = "blocks"
+        return self._decode_python(bits)
+
+    def _decode_python(self, bits):
+        """
+        Decodes a text block by block.
+
+        Parameters:
+            bits (str): The bits to decode.
+
+        Returns:
+            str: The decoded text.
+        """
+        revdict = self.revdict
+        code_length = self.code_length
+        blocks = (bits[k:k + code_length] for k in range(0, len(bits), code_length))
+        return "".join([revdict.get(code, code) for code in blocks])
+
+    def _decode_numpy(self, bits):
+        """
+        Decodes a text in one vectorised step.
+
+        Parameters:
+            bits (str): The bits to decode.
+
+        Returns:
+            str|None: The decoded text, or None if the text contains other characters than 0 and 1.
+        """
+        code_length = self.code_length
+        matrix = (np.frombuffer(bits.encode("latin-1", "replace"), dtype=np.uint8) - ord("0")).reshape(-1, code_length)
+        if matrix.max() > 1:
+            return None  # Not a binary text: keep the foreign characters block by block
+        numbers = np.zeros(len(matrix), dtype=np.int32)
+        for column in range(code_length):
+            numbers <<= 1
+            numbers |= matrix[:, column]
+        if self._table is None:
+            words = [self.revdict.get(code, code) for code in (format(number, f"0{code_length}b") for number in range(1 << code_length))]
+            self._table = np.array(words, dtype=object)
+        return "".join(self._table[numbers].tolist())
+
+    def _decode_translate(self, bits):
+        """
+        Decodes a text by packing each block into one character and translating the characters into words.
+
+        Parameters:
+            bits (str): The bits to decode.
+
+        Returns:
+            str|None: The decoded text, or None if the text contains other characters than 0 and 1.
+        """
+        if bits.count("0") + bits.count("1") != len(bits):
+            return None  # int() would also accept signs, spaces and underscores
+        code_length = self.code_length
+        width = self._width
+        raw = bits.encode("ascii")
+        count = len(raw) // code_length
+        if code_length < width:
+            # Pad each block with 0s: copy the k-th bit of all blocks at once into the k-th position of the padded blocks
+            padded = bytearray(b"0" * (count * width))
+            for k in range(code_length):
+                padded[width - code_length + k::width] = raw[k::code_length]
+            raw = padded
+        packed = int(raw, 2).to_bytes(count * width // 8, "big")
+        chars = packed.decode("latin-1" if width == 8 else "utf-16-be")
+        if self._translation is None:
+            self._translation = _BlockTable(self.revdict, self.code_length)
+        return chars.translate(self._translation)
+
+
+class _BlockTable(dict):
+    """
+    Translation table from block numbers to words, which fills in blocks that are not in the dictionary on first use.
+    """
+    def __init__(self, revdict, code_length):
+        """
+        Initialize the table with the words of the dictionary.
+
+        Parameters:
+            revdict (dict): The words by their codes.
+            code_length (int): The fixed code length.
+        """
+        super().__init__((int(code, 2), word) for code, word in revdict.items())
+        self.code_length = code_length
+
+    def __missing__(self, number):
+        block = self[number] = format(number, f"0{self.code_length}b")  # Unknown blocks stay as they are
+        return block
+
+
+class CodewordTrie:
+    """
+    Trie of the codewords of a code for the Sardinas–Patterson test of unique decodability.
+
+    It finds the codewords that begin a suffix and the codewords that continue it by walking the
+    suffix once instead of comparing it with every codeword.
+    """
+    END = ""  # Key in a node where a codeword ends (never a character of a codeword)
+
+    def __init__(self, codewords):
+        """
+        Builds the trie and notes on the way whether the code is prefix-free.
+
+        Parameters:
+            codewords (iterable): The codewords (binary codes or words of a dictionary).
+        """
+        self.root = {}
+        self.codewords = set(codewords)
+        self.prefix_free = True
+        self._extensions = {}
+        end_key = self.END
+        for word in self.codewords:
+            node = self.root
+            for char in word:
+                if end_key in node:
+                    self.prefix_free = False  # A shorter codeword is a prefix of this one
+                node = node.setdefault(char, {})
+            if node:
+                self.prefix_free = False  # This codeword is a prefix of a longer one
+            node[end_key] = True
+
+    @cached_property
+    def kraft_sum(self):
+        """
+        Returns the Kraft–McMillan sum of the codeword lengths over the alphabet of the code.
+        Uniquely decodable codes have a sum of at most 1.
+
+        Returns:
+            Fraction: The exact sum.
+        """
+        if not self.codewords:
+            return Fraction(0)
+        radix = len(set("".join(self.codewords))) or 1
+        max_length = max(map(len, self.codewords))
+        return Fraction(sum(radix ** (max_length - len(word)) for word in self.codewords), radix ** max_length)
+
+    def tails(self, suffix):
+        """
+        Yields the non-empty rest of the suffix after each codeword that begins it.
+
+        Parameters:
+            suffix (str): The suffix to walk.
+        """
+        end_key = self.END
+        node = self.root
+        for i, char in enumerate(suffix):
+            if end_key in node:
+                yield suffix[i:]
+            node = node.get(char)
+            if node is None:
+                return
+
+    def extensions(self, suffix):
+        """
+        Returns the non-empty rests of the codewords that begin with the suffix.
+
+        Parameters:
+            suffix (str): The suffix to look up.
+
+        Returns:
+            list: The rests of the codewords.
+        """
+        rests = self._extensions.get(suffix)
+        if rests is None:
+            node = self.root
+            for char in suffix:
+                node = node.get(char)
+                if node is None:
+                    break
+            rests = []
+            if node is not None:
+                stack = [(node, "")]
+                while stack:
+                    node, rest = stack.pop()
+                    for char, child in node.items():
+                        if char == self.END:
+                            if rest:
+                                rests.append(rest)
+                        else:
+                            stack.append((child, rest + char))
+            self._extensions[suffix] = rests
+        return rests
+
+
+CHARSETS = ("ascii", "latin-1", "utf-8")  # Standard character encodings available as presets
+
+
+class ByteCodec:
+    """
+    Codec of a standard character encoding with 8 bits per byte.
+    Texts are converted by Python's codecs and the bytes by int.from_bytes and format (and back),
+    so no dictionary is needed and everything runs at C speed.
+    """
+    def __init__(self, charset):
+        """
+        Initialize the codec.
+
+        Parameters:
+            charset (str): The name of the encoding (one of CHARSETS).
+        """
+        self.charset = charset
+
+    def encode(self, text, eol):
+        """
+        Encodes a text line by line, joining the lines with the end-of-line marker.
+
+        Parameters:
+            text (str): The text to encode.
+            eol (str): The end-of-line marker.
+
+        Returns:
+            str: The encoded binary code.
+
+        Raises:
+            Warning: If a character cannot be encoded.
+        """
+        parts = []
+        for line in text.split("\n"):
+            try:
+                data = line.encode(self.charset)
+            except UnicodeEncodeError as e:
+                raise Warning("Kodierprozess", f"\"{line[e.start:]}\" nicht kodierbar")
+            parts.append(format(int.from_bytes(data, "big"), f"0{8 * len(data)}b") if data else "")
+        return eol.join(parts)
+
+    def separates(self, eol):
+        """
+        Checks that an end-of-line marker (one byte) never occurs inside an encoded line: it is the line feed
+        (lines never contain one) or a byte that the encoding does not use.
+
+        Parameters:
+            eol (str): The end-of-line marker.
+
+        Returns:
+            bool: Whether the marker only occurs between lines.
+        """
+        byte = int(eol, 2)
+        if byte == 0x0A:
+            return True
+        if self.charset == "ascii":
+            return byte >= 0x80
+        if self.charset == "utf-8":
+            return byte in (0xC0, 0xC1) or byte >= 0xF5
+        return False  # Latin-1 uses every byte
+
+    def unused_byte(self, eol=""):
+        """
+        Finds the smallest byte that no encoded line starts with: a byte the encoding does not use,
+        or a continuation byte of UTF-8.
+
+        Parameters:
+            eol (str): The end-of-line marker, which is not returned.
+
+        Returns:
+            str: The bits of the byte, or an empty string if every byte can start a line (Latin-1).
+        """
+        if self.charset == "ascii":
+            free = range(0x80, 0x100)
+        elif self.charset == "utf-8":
+            free = [*range(0x80, 0xC2), *range(0xF5, 0x100)]
+        else:
+            free = ()  # Latin-1 uses every byte
+        for byte in free:
+            bits = format(byte, "08b")
+            if bits != eol:
+                return bits
+        return ""
+
+    def decode(self, bits):
+        """
+        Decodes a text.
+
+        Parameters:
+            bits (str): The bits to decode.
+
+        Returns:
+            str|None: The decoded text, or None if the bits are not a valid text of the encoding.
+        """
+        if not bits or len(bits) % 8 or bits.count("0") + bits.count("1") != len(bits):
+            return None
+        try:
+            return int(bits, 2).to_bytes(len(bits) // 8, "big").decode(self.charset)
+        except UnicodeDecodeError:
+            return None
+
+
+class CodecSnapshot:
+    """
+    The structures compiled from one version of the code dictionary, each built on first use.
+
+    A snapshot never changes: when the dictionary, the code length or the end-of-line marker changes,
+    the BinaryCoder creates a new snapshot with a higher version, so caches can key on the version.
+    """
+    def __init__(self, version, code_dict, code_length=0, charset="", eol=""):
+        """
+        Initialize the snapshot.
+
+        Parameters:
+            version (int): The version of the dictionary.
+            code_dict (dict): The code dictionary (word -> binary code).
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            charset (str): The standard encoding used instead of the dictionary, or an empty string.
+            eol (str): The end-of-line marker.
+        """
+        self.version = version
+        self.code_dict = code_dict
+        self.code_length = code_length
+        self.charset = charset
+        self.eol = eol
+
+    @cached_property
+    def decoder(self):
+        """
+        Returns the decoding automaton.
+
+        Returns:
+            PrefixDecoder: The decoding automaton.
+        """
+        return PrefixDecoder(self.code_dict)
+
+    @cached_property
+    def encoder(self):
+        """
+        Returns the encoding trie.
+
+        Returns:
+            EncodeTrie: The encoding trie.
+        """
+        return EncodeTrie(self.code_dict)
+
+    @cached_property
+    def byte_codec(self):
+        """
+        Returns the codec of the standard encoding.
+
+        Returns:
+            ByteCodec|None: The codec, or None if the dictionary is used.
+        """
+        return ByteCodec(self.charset) if self.charset else None
+
+    @cached_property
+    def framing(self):
+        """
+        Returns the compression and framing of the lines of the network.
+
+        Returns:
+            LZ77Framing: The framing.
+        """
+        return LZ77Framing(self.code_length, None if self.code_length else self.decoder, self.header)
+
+    @cached_property
+    def header(self):
+        """
+        Finds the header of compressed lines: bits that no decodable line (a sequence of codes) starts with and
+        that do not contain the end-of-line marker, so a compressed line is never a valid uncompressed line.
+        This is an unused byte for standard encodings, the smallest unused block for fixed code lengths
+        and the shortest bits outside the code trie for prefix-free codes.
+
+        Returns:
+            str: The header, or an empty string if there is none (lines cannot be compressed).
+        """
+        if self.charset:
+            return self.byte_codec.unused_byte(self.eol)
+        if self.code_length:
+            codes = self.codes
+            eol_block = self.eol[:self.code_length]
+            for number in range(len(codes) + 2):
+                if number >= 1 << self.code_length:
+                    break
+                block = format(number, f"0{self.code_length}b")
+                if block not in codes and block != eol_block:
+                    return block
+            return ""
+        return self.decoder.unused_prefix(self.eol)
+
+    @cached_property
+    def translator(self):
+        """
+        Returns the translation encoder if all words are single characters.
+
+        Returns:
+            TranslateEncoder|None: The encoder, or None if the dictionary has longer (or empty) words.
+        """
+        return TranslateEncoder(self.code_dict) if TranslateEncoder.suitable(self.code_dict) else None
+
+    @property
+    def revdict(self):
+        """
+        Returns the reverse map of the dictionary.
+
+        Returns:
+            dict: The words by their codes.
+        """
+        return self.decoder.revdict
+
+    @property
+    def lengths(self):
+        """
+        Returns the occurring code lengths.
+
+        Returns:
+            list(int): The code lengths in ascending order.
+        """
+        return self.decoder.lengths
+
+    @cached_property
+    def codes(self):
+        """
+        Returns the set of all codes.
+
+        Returns:
+            frozenset(str): The codes.
+        """
+        return frozenset(self.code_dict.values())
+
+    @cached_property
+    def fixed_decoder(self):
+        """
+        Returns the decoder for the fixed code length.
+
+        Returns:
+            FixedLengthDecoder: The decoder.
+        """
+        return FixedLengthDecoder(self.revdict, self.code_length)
+
+    @cached_property
+    def wrong_length(self):
+        """
+        Finds a code that does not have the fixed code length.
+
+        Returns:
+            tuple(str, str)|None: The code and its word, or None if all codes have the code length.
+        """
+        for code, word in self.revdict.items():
+            if len(code) != self.code_length:
+                return code, word
+        return None
+
+
+class StreamDecoder:
+    """
+    Decoder of a text that arrives piece by piece, e.g. the unfinished last line of the network.
+
+    feed() decodes only the new bits and continues from the state the previous bits left behind:
+    the bits of an unfinished block for fixed code lengths and standard encodings, the automaton node
+    for prefix-free codes, and the reachable positions of the segmentation for other codes.
+    text() is always identical to decoding all fed bits at once with BinaryCoder.decode_text
+    (or with BinaryCoder.decode_message, if given: lines that start with the header of compressed lines
+    are decoded as a whole, the others piece by piece once the header is ruled out).
+    """
+    def __init__(self, codec, decode_message=None):
+        """
+        Initialize the decoder for a snapshot of the codec.
+
+        Parameters:
+            codec (CodecSnapshot): The snapshot of the dictionary to decode with.
+            decode_message (callable): The decoder of compressed lines; if given, the fed bits of a line
+                that starts with the header are only collected and decoded as a whole by text().
+
+        Raises:
+            Warning: If a binary code does not have the fixed code length.
+        """
+        self.codec = codec
+        self.decode_message = decode_message
+        self.version = codec.version
+        self.length = 0  # Number of fed bits
+        self._chunks = []  # The fed bits
+        self._words = []  # The decoded parts
+        self._pending = ""  # Bits of an unfinished block
+        self._node = 0  # Node of the decoding automaton
+        self._failed = False  # The bits cannot be decoded as a whole
+        self._bytes = None  # Incremental decoder of a standard encoding
+        self._dp = [(-1, "")]  # Segmentation: (previous position, word) of each decodable position, like dec_wo_length
+        self._tail = ""  # Segmentation: the last bits, as far as a code can reach back
+        self._header = codec.framing.header if decode_message else ""  # Header of compressed lines
+        if codec.charset:
+            self.mode = "charset"
+            self._bytes = codecs.getincrementaldecoder(codec.charset)()
+        elif not codec.code_dict:
+            self.mode = "none"
+        elif codec.code_length:
+            if codec.wrong_length:
+                bcode, word = codec.wrong_length
+                raise Warning("Dekodierprozess", f"Binärcode \"{bcode}\" von \"{word}\" hat nicht die Länge {codec.code_length}!")
+            self.mode = "fixed"
+        elif codec.decoder.prefix_free:
+            self.mode = "automaton"
+        elif codec.lengths:
+            self.mode = "segmentation"
+        else:
+            self.mode = "none"
+        self._plain_mode = self.mode
+        if self._header:
+            self.mode = "header"  # Undecided until the bits differ from the header or contain all of it
+
+    def feed(self, bits):
+        """
+        Decodes the next bits.
+
+        Parameters:
+            bits (str): The bits appended to the text.
+
+        Returns:
+            str: The text decoded from the new bits (empty while a code is unfinished or the segmentation is open).
+        """
+        if not bits:
+            return ""
+        self._chunks.append(bits)
+        start = self.length
+        self.length += len(bits)
+        if self.mode == "header":
+            fed = self.bits()
+            known = min(len(fed), len(self._header))
+            if fed[:known] != self._header[:known]:
+                # An uncompressed line: decode all bits so far piece by piece from now on
+                self.mode = self._plain_mode
+                self._chunks = []
+                self.length = 0
+                return self.feed(fed)
+            if known == len(self._header):
+                self.mode = "framed"  # A compressed line can refer back to any earlier part
+            return ""
+        if self._failed or self.mode in ("none", "framed"):
+            return ""
+        if self.mode == "automaton":
+            result = self.codec.decoder.feed(bits, self._node)
+            if result is None:
+                self._failed = True
+                return ""
+            words, self._node = result
+            text = "".join(words)
+        elif self.mode == "segmentation":
+            self._segment(bits, start)
+            return ""
+        else:
+            bits = self._pending + bits
+            block = 8 if self.mode == "charset" else self.codec.code_length
+            cut = len(bits) - len(bits) % block
+            self._pending = bits[cut:]
+            if not cut:
+                return ""
+            if self.mode == "fixed":
+                text = self.codec.fixed_decoder.decode(bits[:cut])
+            else:
+                if bits.count("0", 0, cut) + bits.count("1", 0, cut) != cut:
+                    self._failed = True
+                    return ""
+                try:
+                    text = self._bytes.decode(int(bits[:cut], 2).to_bytes(cut // 8, "big"))
+                except UnicodeDecodeError:
+                    self._failed = True
+                    return ""
+        self._words.append(text)
+        return text
+
+    def _segment(self, bits, start):
+        """
+        Extends the segmentation of dec_wo_length to the new bits.
+
+        Parameters:
+            bits (str): The new bits.
+            start (int): The number of bits fed before.
+        """
+        revdict = self.codec.revdict
+        lengths = self.codec.lengths
+        dp = self._dp
+        window = self._tail + bits
+        offset = start - len(self._tail)  # Position of the window in the text
+        for i in range(start + 1, self.length + 1):
+            entry = (0, "")
+            for l in lengths:
+                if i - l < 0:
+                    break
+                code = window[i - l - offset:i - offset]
+                if code in revdict and dp[i - l] != (0, ""):
+                    entry = (i - l, revdict[code])
+                    break
+            dp.append(entry)
+        self._tail = window[-(lengths[-1] - 1):] if lengths[-1] > 1 else ""
+
+    def text(self):
+        """
+        Returns the decoded text of all fed bits, or the bits themselves if they cannot be decoded.
+
+        Returns:
+            str: The text, exactly as BinaryCoder.decode_text returns it for all fed bits.
+        """
+        if not self.length:
+            return ""
+        if self.mode in ("header", "framed"):
+            return self.decode_message(self.bits())
+        if self._failed or self.mode == "none" or self._pending or self._node:
+            return self.bits()
+        if self.mode == "charset" and self._bytes.getstate()[0]:
+            return self.bits()  # An unfinished character
+        if self.mode == "segmentation":
+            dp = self._dp
+            idx = self.length
+            if dp[idx] == (0, ""):
+                return self.bits()
+            result = []
+            while idx > 0:
+                idx, word = dp[idx]
+                result.append(word)
+            return "".join(reversed(result))
+        return "".join(self._words)
+
+    def bits(self):
+        """
+        Returns all fed bits.
+
+        Returns:
+            str: The bits.
+        """
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def checkpoint(self):
+        """
+        Saves the state of the decoder, so it can be restored after feeding bits that turn out to be wrong.
+
+        Returns:
+            tuple: The state (only meaningful to restore()).
+        """
+        bytes_state = self._bytes.getstate() if self._bytes else None
+        return (self.length, self.bits(), len(self._words), self._pending, self._node,
+                self._failed, bytes_state, len(self._dp), self._tail, self.mode)
+
+    def restore(self, state):
+        """
+        Restores a state saved by checkpoint(), dropping everything fed since.
+
+        Parameters:
+            state (tuple): The state to restore.
+        """
+        self.length, bits, words, self._pending, self._node, self._failed, bytes_state, dp, self._tail, self.mode = state
+        self._chunks = [bits] if bits else []
+        del self._words[words:]
+        del self._dp[dp:]
+        if self._bytes:
+            self._bytes.setstate(bytes_state)
+
+
+class LineCache:
+    """
+    Bounded LRU cache of decoded lines, so lines that were decoded before (e.g. on the previous reload)
+    are not decoded again. The entries belong to one dictionary version and code length and are dropped
+    all at once when these change.
+    """
+    max_lines = 20000  # Most lines kept
+    max_bits = 1 << 24  # Most bits of the kept lines
+
+    def __init__(self):
+        """
+        Initialize the empty cache.
+        """
+        self.key = None  # (version, code length) of the cached lines
+        self.hits = 0
+        self.misses = 0
+        self.bits = 0  # Bits of the cached lines
+        self._texts = OrderedDict()  # Decoded text by binary line, the least recently used first
+
+    def get(self, key, line):
+        """
+        Looks up the decoded text of a line.
+
+        Parameters:
+            key (tuple): The (version, code length) of the current dictionary.
+            line (str): The binary line.
+
+        Returns:
+            str|None: The decoded text, or None if the line is not cached.
+        """
+        if key != self.key:
+            self.clear()
+            self.key = key
+        text = self._texts.get(line)
+        if text is None:
+            self.misses += 1
+            return None
+        self._texts.move_to_end(line)
+        self.hits += 1
+        return text
+
+    def put(self, key, line, text):
+        """
+        Adds the decoded text of a line, dropping the least recently used lines beyond the bounds.
+
+        Parameters:
+            key (tuple): The (version, code length) of the dictionary the text was decoded with.
+            line (str): The binary line.
+            text (str): The decoded text.
+        """
+        if key != self.key or len(line) > self.max_bits or line in self._texts:
+            return
+        self._texts[line] = text
+        self.bits += len(line)
+        while len(self._texts) > self.max_lines or self.bits > self.max_bits:
+            old, _ = self._texts.popitem(last=False)
+            self.bits -= len(old)
+
+    def clear(self):
+        """
+        Drops all cached lines (the counters are kept).
+        """
+        self._texts.clear()
+        self.bits = 0
+        self.key = None
+
+    def __len__(self):
+        return len(self._texts)
@@ -0,0 +1,169 @@
+MIN_MATCH = 2  # Fewest codes copied by a reference
+
+
+def gamma(number):
+    """
+    Writes a positive number as Elias gamma code (as many leading 0s as the binary number has bits after the first).
+
+    Parameters:
+        number (int): The number (at least 1).
+
+    Returns:
+        str: The bits.
+    """
+    binary = format(number, "b")
+    return "0" * (len(binary) - 1) + binary
+
+
+def read_gamma(bits, pos):
+    """
+    Reads an Elias gamma code.
+
+    Parameters:
+        bits (str): The bits.
+        pos (int): The start of the code.
+
+    Returns:
+        tuple(int, int)|None: The number and the position after the code, or None if there is no complete code.
+    """
+    end = bits.find("1", pos)
+    if end == -1:
+        return None
+    stop = end + (end - pos) + 1
+    if stop > len(bits):
+        return None
+    return int(bits[end:stop], 2), stop
+
+
+class LZ77Framing:
+    """
+    Compression of a line of the network by LZ77 over the codes of its words, with a header that marks
+    the line as compressed.
+
+    The compressed line is a sequence of tokens: a literal is a 0 followed by a code of the dictionary,
+    a reference is a 1 followed by the distance back (in codes) and the number of codes to copy, both as
+    Elias gamma codes. Uncompressed lines are sent unchanged; the header consists of bits no decodable uncompressed
+    line starts with (see CodecSnapshot.header), so a compressed line never decodes as an uncompressed one.
+    For fixed-length codes the header is one block and the compressed line is padded with 0s to whole blocks,
+    so the end-of-line markers stay aligned.
+    """
+    max_candidates = 32  # Most earlier positions compared when looking for a repetition
+
+    def __init__(self, code_length=0, decoder=None, header=""):
+        """
+        Initialize the framing of a dictionary.
+
+        Parameters:
+            code_length (int): The fixed code length, or 0 for variable-length codes.
+            decoder (PrefixDecoder): The decoder of a variable-length code, to find where a literal code ends.
+            header (str): The header of compressed lines, or an empty string if there is none.
+        """
+        self.code_length = code_length
+        self.decoder = decoder
+        self.header = header
+        # Compressed lines need a header, and literals can only be read back if their end is known
+        self.can_compress = bool(header) and (bool(code_length) or (decoder is not None and decoder.prefix_free))
+
+    def compress(self, codes):
+        """
+        Compresses the codes of a line (without header).
+
+        Parameters:
+            codes (list): The binary codes of the words of the line.
+
+        Returns:
+            str: The tokens.
+        """
+        tokens = []
+        earlier = {}  # Positions by the codes starting there (MIN_MATCH of them)
+        n = len(codes)
+        i = 0
+        while i < n:
+            length = distance = 0
+            for j in reversed(earlier.get(tuple(codes[i:i + MIN_MATCH]), ())[-self.max_candidates:]):
+                k = 0
+                while i + k < n and codes[j + k] == codes[i + k]:
+                    k += 1  # The copy may overlap the codes it produces
+                if k > length:
+                    length, distance = k, i - j
+            step = 1
+            if length >= MIN_MATCH:
+                reference = "1" + gamma(distance) + gamma(length - MIN_MATCH + 1)
+                if len(reference) < sum(1 + len(code) for code in codes[i:i + length]):
+                    tokens.append(reference)
+                    step = length
+            if step == 1:
+                tokens.append("0" + codes[i])
+            for k in range(i, min(i + step, n - MIN_MATCH + 1)):
+                earlier.setdefault(tuple(codes[k:k + MIN_MATCH]), []).append(k)
+            i += step
+        payload = "".join(tokens)
+        if self.code_length:
+            payload += "0" * (-len(payload) % self.code_length)
+        return payload
+
+    def expand(self, payload):
+        """
+        Restores the codes of a compressed line (without header).
+
+        Parameters:
+            payload (str): The tokens.
+
+        Returns:
+            str|None: The uncompressed bits, or None if the tokens are invalid.
+        """
+        code_length = self.code_length
+        codes = []
+        n = len(payload)
+        pos = 0
+        while pos < n:
+            if code_length and n - pos <= code_length and "1" not in payload[pos:]:
+                break  # Padding to whole blocks
+            flag = payload[pos]
+            pos += 1
+            if flag == "0":
+                end = pos + code_length if code_length else self.decoder.code_end(payload, pos)
+                if end < 0 or end > n:
+                    return None
+                codes.append(payload[pos:end])
+                pos = end
+            elif flag == "1":
+                distance = read_gamma(payload, pos)
+                length = distance and read_gamma(payload, distance[1])
+                if not length or distance[0] > len(codes):
+                    return None
+                start = len(codes) - distance[0]
+                for k in range(length[0] + MIN_MATCH - 1):
+                    codes.append(codes[start + k])
+                pos = length[1]
+            else:
+                return None
+        return "".join(codes)
+
+    def is_packed(self, bits):
+        """
+        Checks whether a line is compressed.
+
+        Parameters:
+            bits (str): The line.
+
+        Returns:
+            bool: Whether the line starts with the header.
+        """
+        return bool(self.header) and bits.startswith(self.header)
+
+    def unframe(self, bits):
+        """
+        Expands a line if it is compressed.
+
+        Parameters:
+            bits (str): The line.
+
+        Returns:
+            str|None: The uncompressed bits (the line itself if it is not compressed), or None if the tokens are invalid.
+        """
+        if not self.is_packed(bits):
+            return bits
+        if not self.can_compress:
+            return None
+        return self.expand(bits[len(self.header):])
@@ -0,0 +1,208 @@
+import heapq
+import math
+import sys
+from collections import Counter
+from .codec import EncodeTrie
+
+UNSUPPORTED = ",=\"\n"  # Characters that cannot be written as words of a dictionary text (and line breaks)
+
+
+class OptimalCode:
+    """
+    Code dictionary with the shortest possible codes for a sample text (e.g. the decoded network history).
+
+    Each character of the text becomes a word. The code lengths are found with Huffman's algorithm, or with
+    the package-merge algorithm if the codes may not be longer than a given number of bits. The codes are
+    then assigned canonically (shorter codes first, counting upwards), so the code is prefix-free and
+    the same lengths always give the same dictionary.
+    """
+    def __init__(self, text, max_length=0):
+        """
+        Builds the code for the text.
+
+        Parameters:
+            text (str): The sample text.
+            max_length (int): The longest allowed code, or 0 for no limit.
+
+        Raises:
+            Warning: If the text contains no encodable character or the limit is too small.
+        """
+        # The lines of the text without the characters that cannot become words
+        self.lines = ["".join(char for char in line if char not in UNSUPPORTED) for line in text.split("\n")]
+        self.counts = Counter(char for line in self.lines for char in line)
+        self.skipped = sorted({char for char in text if char in UNSUPPORTED and char != "\n"})
+        self.total = sum(self.counts.values())
+        if not self.counts:
+            raise Warning("Wörterbuch", "Der Text enthält keine kodierbaren Zeichen!")
+        if max_length:
+            if 2 ** max_length < len(self.counts):
+                raise Warning("Wörterbuch", f"Mit höchstens {max_length} Bits lassen sich nur {2 ** max_length} Zeichen kodieren, der Text enthält {len(self.counts)}!")
+            self.lengths = self.package_merge_lengths(self.counts, max_length)
+        else:
+            self.lengths = self.huffman_lengths(self.counts)
+        self.code_dict = self.canonical_codes(self.lengths)
+
+    @staticmethod
+    def huffman_lengths(counts):
+        """
+        Finds the optimal code lengths by repeatedly joining the two rarest groups of characters.
+
+        Parameters:
+            counts (Counter): The number of occurrences of each character.
+
+        Returns:
+            dict: The code length of each character.
+        """
+        if len(counts) == 1:
+            return {char: 1 for char in counts}
+        lengths = dict.fromkeys(counts, 0)
+        # (count, tiebreaker, characters) - the tiebreaker keeps the order stable and avoids comparing lists
+        heap = [(count, i, [char]) for i, (char, count) in enumerate(sorted(counts.items()))]
+        heapq.heapify(heap)
+        order = len(heap)
+        while len(heap) > 1:
+            count1, _, chars1 = heapq.heappop(heap)
+            count2, _, chars2 = heapq.heappop(heap)
+            for char in chars1 + chars2:
+                lengths[char] += 1  # Every join adds a bit to the codes of both groups
+            heapq.heappush(heap, (count1 + count2, order, chars1 + chars2))
+            order += 1
+        return lengths
+
+    @staticmethod
+    def package_merge_lengths(counts, max_length):
+        """
+        Finds the optimal code lengths of at most max_length bits with the package-merge algorithm.
+
+        Parameters:
+            counts (Counter): The number of occurrences of each character.
+            max_length (int): The longest allowed code.
+
+        Returns:
+            dict: The code length of each character.
+        """
+        if len(counts) == 1:
+            return {char: 1 for char in counts}
+        leaves = sorted((count, char) for char, count in counts.items())
+        leaves = [(count, [char]) for count, char in leaves]
+        current = leaves
+        for _ in range(max_length - 1):
+            # Package neighbouring pairs and merge the packages into the leaves again
+            packages = [(current[i][0] + current[i + 1][0], current[i][1] + current[i + 1][1])
+                        for i in range(0, len(current) - 1, 2)]
+            current = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+        lengths = dict.fromkeys(counts, 0)
+        for _, chars in current[:2 * len(counts) - 2]:
+            for char in chars:
+                lengths[char] += 1
+        return lengths
+
+    @staticmethod
+    def canonical_codes(lengths):
+        """
+        Assigns the canonical codes for the code lengths.
+
+        Parameters:
+            lengths (dict): The code length of each character.
+
+        Returns:
+            dict: The code dictionary (character -> binary code), shortest codes first.
+        """
+        code_dict = {}
+        code = 0
+        previous = 0
+        for char, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+            code <<= length - previous
+            code_dict[char] = format(code, f"0{length}b")
+            code += 1
+            previous = length
+        return code_dict
+
+    @property
+    def bits_per_symbol(self):
+        """
+        Returns the expected number of bits per character of the sample text.
+
+        Returns:
+            float: The bits per character.
+        """
+        return sum(self.counts[char] * len(code) for char, code in self.code_dict.items()) / self.total
+
+    @property
+    def entropy(self):
+        """
+        Returns the entropy of the characters of the sample text, the lower bound of the bits per character.
+
+        Returns:
+            float: The entropy in bits per character.
+        """
+        return -sum(count / self.total * math.log2(count / self.total) for count in self.counts.values())
+
+    def compare(self, code_dict):
+        """
+        Returns the bits per character that another dictionary needs for the sample text.
+
+        Parameters:
+            code_dict (dict): The dictionary to compare with (e.g. the current one).
+
+        Returns:
+            float|None: The bits per character, or None if the dictionary cannot encode the text.
+        """
+        if not code_dict:
+            return None
+        encoder = EncodeTrie(code_dict)
+        try:
+            return sum(len(encoder.encode(line, "")) for line in self.lines) / self.total
+        except Warning:
+            return None
+
+    def to_text(self):
+        """
+        Returns the dictionary in the format of BinaryCoder.dict_to_text.
+
+        Returns:
+            str: The dictionary text.
+        """
+        return ", ".join(f'"{k}"={v}' for k, v in self.code_dict.items()) + ","
+
+    def report(self, code_dict=None):
+        """
+        Describes the code in comparison with another dictionary.
+
+        Parameters:
+            code_dict (dict): The dictionary to compare with (e.g. the current one).
+
+        Returns:
+            str: The description.
+        """
+        text = f"{self.bits_per_symbol:.2f} Bits pro Zeichen (Entropie {self.entropy:.2f})"
+        if code_dict:
+            current = self.compare(code_dict)
+            if current is None:
+                text += ", das bisherige Wörterbuch kann den Text nicht kodieren"
+            else:
+                text += f", bisher {current:.2f}"
+        if self.skipped:
+            text += ", nicht kodierbar: " + " ".join(self.skipped)
+        return text
+
+
+def main():
+    """
+    Prints the optimal dictionary of a text file: python -m engine.logic.protocol.dict_builder <file> [max_length]
+    """
+    if len(sys.argv) < 2:
+        print(main.__doc__.strip())
+        return
+    with open(sys.argv[1], encoding="utf-8") as f:
+        text = f.read()
+    try:
+        code = OptimalCode(text, int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    except Warning as w:
+        print(w.args[-1])
+        return
+    print(code.to_text())
+    print(code.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_coder = None  # BinaryCoder of a worker process
+
+
+def _init_worker(code_dict, code_length, charset, eol, compression):
+    """
+    Sets up the coder of a worker process once, with the dictionary of the pool.
+
+    Parameters:
+        code_dict (dict): The code dictionary (word -> binary code).
+        code_length (int): The fixed code length, or 0 for variable-length codes.
+        charset (str): The standard encoding used instead of the dictionary, or an empty string.
+        eol (str): The end-of-line marker, on which the header of compressed lines depends.
+        compression (bool): Whether compressed lines are expanded.
+    """
+    global _coder
+    from .bin_coder import BinaryCoder
+    _coder = BinaryCoder()
+    _coder.update_dict(code_dict)
+    if charset:
+        _coder.update_charset(charset)
+    elif code_length:
+        _coder.update_code_length(code_length)
+    _coder.update_eol(eol)
+    _coder.update_compression(compression)
+    _coder.codec  # Compile the dictionary before the first chunk arrives
+
+
+def _decode_chunk(lines):
+    """
+    Decodes a chunk of lines in a worker process.
+
+    Parameters:
+        lines (list): The binary lines.
+
+    Returns:
+        tuple(list, float): The decoded lines and the seconds the decoding took.
+    """
+    start = time.perf_counter()
+    texts = [_coder.decode_message(line) for line in lines]
+    return texts, time.perf_counter() - start
+
+
+class DecodePool:
+    """
+    Process pool that decodes many lines in parallel, e.g. the whole history of a network.
+
+    The dictionary is shipped to the workers once, when the pool is started, and each worker compiles it
+    for itself; a new dictionary version starts a new pool. The lines are sent in chunks of about the same
+    number of bits and the results come back in order. Inputs too small to pay off the transfer are decoded
+    in the calling process, as are all inputs if no pool can be started.
+    """
+    min_bits = 1 << 21  # Fewest bits decoded on the pool
+    chunks_per_worker = 4  # Chunks per worker, so that uneven chunks are balanced
+
+    def __init__(self, workers=None):
+        """
+        Initialize the pool (the worker processes are started on first use).
+
+        Parameters:
+            workers (int): The number of worker processes (all but one core if not given).
+        """
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)
+        self.timings = []  # (lines, bits, seconds, "pool" or "local") of each chunk of the last call
+        self._executor = None
+        self._version = None
+        self._failed = False  # No pool could be started, decode in the calling process from now on
+
+    def _executor_for(self, coder):
+        """
+        Returns the pool for the current dictionary version of the coder, starting it if necessary.
+
+        Parameters:
+            coder (BinaryCoder): The coder whose dictionary is used.
+
+        Returns:
+            ProcessPoolExecutor: The pool.
+        """
+        if self._executor is None or self._version != coder.version:
+            self.close()
+            # Spawned workers do not inherit the threads and the Tk state of the application
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(coder.dict, coder.code_length, coder.charset, coder.eol, coder.compression),
+            )
+            self._version = coder.version
+        return self._executor
+
+    def decode(self, coder, lines):
+        """
+        Decodes the lines like coder.decode_message, in parallel if the input is large enough.
+
+        Parameters:
+            coder (BinaryCoder): The coder whose dictionary is used.
+            lines (list): The binary lines.
+
+        Returns:
+            list: The decoded lines, in the order of the input.
+        """
+        bits = sum(map(len, lines))
+        if self._failed or self.workers < 2 or bits < self.min_bits or len(lines) < 2:
+            return self._decode_local(coder, lines, bits)
+        chunks = self._split(lines, bits)
+        try:
+            executor = self._executor_for(coder)
+            results = list(executor.map(_decode_chunk, chunks))
+        except (OSError, BrokenProcessPool, RuntimeError) as e:
+            print(f"Achtung: Paralleles Dekodieren nicht möglich ({e}), dekodiere ohne Prozesspool.")
+            self._failed = True
+            self.close()
+            return self._decode_local(coder, lines, bits)
+        self.timings = [(len(chunk), sum(map(len, chunk)), seconds, "pool") for chunk, (_, seconds) in zip(chunks, results)]
+        return [text for texts, _ in results for text in texts]
+
+    def _decode_local(self, coder, lines, bits):
+        """
+        Decodes the lines in the calling process.
+
+        Parameters:
+            coder (BinaryCoder): The coder whose dictionary is used.
+            lines (list): The binary lines.
+            bits (int): The number of bits of all lines.
+
+        Returns:
+            list: The decoded lines.
+        """
+        start = time.perf_counter()
+        texts = [coder.decode_message(line) for line in lines]
+        self.timings = [(len(lines), bits, time.perf_counter() - start, "local")]
+        return texts
+
+    def _split(self, lines, bits):
+        """
+        Splits the lines into consecutive chunks of about the same number of bits.
+
+        Parameters:
+            lines (list): The binary lines.
+            bits (int): The number of bits of all lines.
+
+        Returns:
+            list(list): The chunks.
+        """
+        target = bits // (self.workers * self.chunks_per_worker) + 1
+        chunks = []
+        chunk = []
+        size = 0
+        for line in lines:
+            chunk.append(line)
+            size += len(line)
+            if size >= target:
+                chunks.append(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def close(self):
+        """
+        Shuts the worker processes down (a new pool is started on the next large input).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._version = None
@@ -11,5 +11,8 @@ setup(
     install_requires=[
         # NOTHING
     ],
-    python_requires='>=3.6',
+    extras_require={
+        "fast": ["numpy"],  # Vectorised decoding of fixed-length codes
+    },
+    python_requires='>=3.8',  # multiprocessing.shared_memory, memoryview.toreadonly, functools.cached_property
 )
\ No newline at end of file